@@ -5,6 +5,7 @@ from src import select_input as input
 from src.session import init_session_state 
 from src.checking import check_user_input
 from src.logging_attempts import log_incorrect_attempt
+from src.verb_audio import form_audio, can_synthesize
 from openpyxl.styles import PatternFill
 from datetime import datetime
 import pandas as pd
@@ -91,17 +92,21 @@ if (selected_filter != st.session_state["last_filter"]) or (selected_tense != st
 # --------- TASK SETUP ---------
 if "current_task" not in st.session_state:
     tense_filter = [t for t in selected_tense if t != "(Random)"]
+    # Forms queued from Voice Chat come first
+    drill = st.session_state.practice_deck.pop(0) if st.session_state.practice_deck else None
     row, col, verb, prompt, translation = input.get_random_task(
         ws_solution,
         selected_filter,
         tense_filter if tense_filter else None,
+        preferred=(drill["row"], drill["col"]) if drill else None,
     )
     st.session_state.current_task = {
         "row": row,
         "col": col,
         "verb": verb,
         "prompt": prompt,
-        "translation": translation
+        "translation": translation,
+        "drill": drill if drill and (row, col) == (drill["row"], drill["col"]) else None,
     }
 else:
     task = st.session_state.current_task
@@ -110,6 +115,7 @@ else:
     verb = task["verb"]
     prompt = task["prompt"]
     translation = task["translation"]
+drill = st.session_state.current_task.get("drill")
 
 # If the verb has changed, trigger input reset
 if verb != st.session_state.last_verb:
@@ -120,6 +126,8 @@ if verb != st.session_state.last_verb:
 if row is None:
     st.success("🎉 All verbs have been completed!")
 else:
+    if drill:
+        st.info(f"🎙️ From your voice chat: {drill['reason']} ({len(st.session_state.practice_deck)} more queued)")
     st.subheader(f"Verb: **{verb}**")
     st.write(f"Conjugate for: **{prompt}**")
 
@@ -162,6 +170,12 @@ else:
             if st.session_state.attempts >= 1:
                 with st.expander("📖 Show correct answer"):
                     st.markdown(f"**Correct answer:** `{correct_answer}`")
+                    # pack clips are a local read; TTS waits for the play button below
+                    audio = form_audio(correct_answer, row, col, synthesize=False)
+                    if audio:
+                        st.audio(audio[0], format=audio[1])
+                if not audio and can_synthesize():
+                    st.session_state.answer_audio = {"text": correct_answer, "row": row, "col": col}
 
             # TODO: Retrying incorrect tries empties the input cell, but here we would want to keep it
             log_incorrect_attempt(verb, tense, subject, user_input, correct_answer, log_path="error_log.csv")
@@ -176,7 +190,17 @@ else:
         # # ✅ Clear the input field AFTER saving and feedback
         st.session_state.clear_input = True
 
+# Hear the correct form, synthesized only when asked for (the call blocks this rerun)
+answer_audio = st.session_state.get("answer_audio")
+if answer_audio and (answer_audio["row"], answer_audio["col"]) == (row, col):
+    if st.button("🔊 Hear the correct form"):
+        with st.spinner("Synthesizing..."):
+            audio = form_audio(answer_audio["text"], row, col)
+        if audio:
+            st.audio(audio[0], format=audio[1], autoplay=True)
+
 if st.button("Next verb"):
+    st.session_state.pop("answer_audio", None)
     st.session_state.pop("current_task", None)
     st.session_state.reset_input = True  # ✅ sets flag
     st.rerun()
@@ -202,6 +226,5 @@ if st.button("Next verb"):
 
 # FURTHER IDEAS:
 # TODO: Link to full table of conjugations for given verb?
-# TODO: Audio playback (using an MP3 and st.audio())?
 # TODO: A third tab with vocab trainer? You could for example add a button on the Practice tab that adds a word to the vocab trainer with translation
 # TODO: Use database instead of Excel as backend
\ No newline at end of file
@@ -4,10 +4,20 @@ Uses OpenAI API for low-latency voice conversations in French
 """
 
 import streamlit as st
+import streamlit.components.v1 as components
 import os
-from openai import OpenAI
-import tempfile
+from src.openai_clients import get_client
 import audio_recorder_streamlit as recorder
+from src.voice_pipeline import voice_turn, audio_queue_html, audio_digest, as_upload
+from src.audio_prep import prepare_recording
+from src import voice_jobs
+from src.voice_context import ConversationContext, KEEP_TURNS, TOKEN_BUDGET
+from src import form_index
+from src.conversation_store import get_store, PAGE_SIZE
+from collections import Counter
+
+POLL_SECONDS = 0.3   # how often a running turn is checked for new text and audio
+HISTORY_WINDOW = 40  # messages kept in session (and reloaded from the store after a refresh)
 
 # Page config
 st.set_page_config(page_title="Voice Chat", page_icon="🎙️", layout="wide")
@@ -17,21 +27,67 @@ st.title("🎙️ Voice Chat - Parlez Français!")
 # Initialize session state
 if "conversation_history" not in st.session_state:
     st.session_state.conversation_history = []
-if "audio_response" not in st.session_state:
-    st.session_state.audio_response = None
-if "processing" not in st.session_state:
-    st.session_state.processing = False
-if "last_audio_bytes" not in st.session_state:
-    st.session_state.last_audio_bytes = None
+if "reply_seq" not in st.session_state:
+    st.session_state.reply_seq = None            # stored turn holding the latest reply's audio
+st.session_state.pop("audio_response", None)     # reply audio used to be kept in session memory
+st.session_state.pop("history_pages", None)      # replaced by history_turns
+if "voice_job" not in st.session_state:
+    st.session_state.voice_job = None
+st.session_state.pop("processing", None)  # the running job is the concurrency guard now
+if "last_audio_digest" not in st.session_state:
+    st.session_state.last_audio_digest = None
+st.session_state.pop("last_audio_bytes", None)  # recordings used to be kept here; only the digest is needed
 if "status_message" not in st.session_state:
     st.session_state.status_message = None
+if "stop_audio" not in st.session_state:
+    st.session_state.stop_audio = False
+if "voice_context" not in st.session_state:
+    st.session_state.voice_context = ConversationContext()
+if "practice_deck" not in st.session_state:
+    st.session_state.practice_deck = []          # drills for the Conjugations page
+if "voice_verb_counts" not in st.session_state:
+    st.session_state.voice_verb_counts = Counter()
+if "last_turn_mistakes" not in st.session_state:
+    st.session_state.last_turn_mistakes = []
+
+# Conversation: persisted in SQLite, its id in the URL (?c=...) so refreshes and other tabs continue it
+store = get_store()
+
+def open_conversation(cid, saved: bool = True):
+    st.session_state.conversation_id = cid
+    st.session_state.conversation_saved = saved   # ?c= is only set once a turn has been stored
+    if saved:
+        st.query_params["c"] = cid
+    else:
+        st.query_params.pop("c", None)
+    st.session_state.conversation_history = store.messages(cid, HISTORY_WINDOW)
+    st.session_state.voice_context.reset()
+    st.session_state.reply_seq = store.last_audio_seq(cid)
+    # turns shown in Full Conversation, oldest first: grown by "Load older" and by new turns, never re-read
+    st.session_state.history_turns = store.page(cid) if saved else []
+
+url_cid = st.query_params.get("c")
+if url_cid and url_cid != st.session_state.get("conversation_id") and store.exists(url_cid):
+    open_conversation(url_cid)
+elif "conversation_id" not in st.session_state:
+    open_conversation(store.new_conversation(), saved=False)
+elif st.session_state.get("conversation_saved", True) and url_cid != st.session_state.conversation_id:
+    st.query_params["c"] = st.session_state.conversation_id   # page switches drop the query string
+
+# Build the form index off the script thread; it is ready long before the first transcript
+form_index.preload()
+
+# Stop reply clips still queued from before a Clear History
+if st.session_state.stop_audio:
+    components.html(audio_queue_html(clear=True), height=0)
+    st.session_state.stop_audio = False
 
 # Information section at the top
 with st.expander("ℹ️ How to use"):
     st.markdown("""
     1. **Record**: Click the microphone button on the left and speak in French
     2. **Stop**: The recording will auto-stop after ~3 seconds of silence
-    3. **Listen**: The AI's response plays at the top of the conversation
+    3. **Listen**: The AI's reply starts playing after its first sentence
     4. **Continue**: Keep the conversation going!
     
     **Tips:**
@@ -84,13 +140,27 @@ Parle à un rythme normal, comme un vrai Parisien de 30 ans. N'hésite pas à co
         height=120
     )
 
+    keep_turns = st.slider(
+        "Recent exchanges sent word for word",
+        min_value=2, max_value=20, value=KEEP_TURNS,
+        help="Older exchanges are summarized in the background to keep replies fast in long sessions"
+    )
+    token_budget = st.slider(
+        "Context budget (tokens)",
+        min_value=500, max_value=8000, value=TOKEN_BUDGET, step=250,
+        help="Upper bound on the prompt sent each turn (system prompt + summary + recent exchanges)"
+    )
+
+context = st.session_state.voice_context
+context.keep_turns, context.token_budget = keep_turns, token_budget
+
 # Check if API key is available
 if not api_key:
     st.warning("⚠️ Please enter your OpenAI API key in the Settings section above.")
     st.stop()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=api_key)
+# OpenAI client, shared across reruns and sessions (pooled keep-alive connections)
+client = get_client(api_key)
 
 # SINGLE COLUMN LAYOUT
 
@@ -112,151 +182,196 @@ status_container = st.container()
 st.markdown("### 💬 Conversation")
 
 # Play the latest audio response (always show)
-if st.session_state.audio_response:
+reply_audio = store.audio(st.session_state.conversation_id, st.session_state.reply_seq) if st.session_state.reply_seq else None
+if reply_audio:
     st.markdown("**🔊 Latest response:**")
     try:
-        # Audio player with autoplay
-        st.audio(st.session_state.audio_response, format="audio/mpeg", autoplay=True)
+        # Replay control; the reply already played sentence by sentence while it streamed
+        st.audio(reply_audio[0], format=reply_audio[1])
     except Exception as e:
         st.error(f"❌ Could not play audio. Error: {str(e)}")
         st.info("Make sure your OpenAI API key is valid and has access to the text-to-speech API.")
 
+if st.session_state.last_turn_mistakes:
+    st.markdown("**✏️ Check your verbs:** " + " · ".join(st.session_state.last_turn_mistakes))
+if st.session_state.practice_deck:
+    st.caption(f"📚 {len(st.session_state.practice_deck)} verb form(s) from this chat are queued "
+               "on the Conjugations page.")
+
 st.markdown("---")
 
-# Display conversation history in an expandable section
-if st.session_state.conversation_history:
+# Display conversation history in an expandable section (newest pages only, read from the store)
+if "history_turns" not in st.session_state:
+    st.session_state.history_turns = store.page(st.session_state.conversation_id)
+turns = st.session_state.history_turns
+if turns:
     with st.expander("📜 Full Conversation", expanded=False):
+        if context.summary:
+            st.caption(f"🧠 Summary of earlier exchanges: {context.summary}")
+
+        older = turns[0]["seq"] - 1   # seq numbers run 1, 2, 3 ... per conversation
+        if older > 0:
+            if st.button(f"⬆️ Load older messages ({older} more)", key="older_history_btn"):
+                # keyset page: only the PAGE_SIZE turns before the oldest one loaded
+                turns[:0] = store.page(st.session_state.conversation_id, before=turns[0]["seq"], limit=PAGE_SIZE)
+                st.rerun()
+
         # Show conversation
-        for i, msg in enumerate(st.session_state.conversation_history):
+        for i, msg in enumerate(turns):
             if msg["role"] == "user":
                 st.markdown(f"**🗣️ You:** {msg['content']}")
             else:
                 st.markdown(f"**🤖 Assistant:** {msg['content']}")
             
-            if i < len(st.session_state.conversation_history) - 1:
+            if i < len(turns) - 1:
                 st.markdown("")
     
     st.markdown("---")
     
     # Clear History button
     if st.button("🗑️ Clear History", key="clear_history_btn", type="secondary", use_container_width=True):
-        st.session_state.conversation_history = []
-        st.session_state.audio_response = None
-        st.session_state.processing = False
-        st.session_state.last_audio_bytes = None
+        # the old conversation stays in the store; continue in a new one
+        open_conversation(store.new_conversation(), saved=False)
+        st.session_state.voice_verb_counts = Counter()
+        st.session_state.last_turn_mistakes = []
+        if st.session_state.voice_job is not None:
+            st.session_state.voice_job.cancel()
+            st.session_state.voice_job = None
+        st.session_state.last_audio_digest = None
         st.session_state.status_message = None
+        st.session_state.stop_audio = True
         st.rerun()
 else:
     st.info("👈 Start recording above to begin the conversation!")
 
-# Handle audio processing (process immediately and update state)
+# Turn progress: the turn runs on a background thread (src.voice_jobs) and this
+# fragment polls it, so the script thread never waits on the API
+@st.fragment(run_every=POLL_SECONDS)
+def turn_progress():
+    job = st.session_state.voice_job
+    if job is None:
+        return
+    new_clips = job.take_clips()
+    for clip in new_clips:
+        components.html(audio_queue_html(clip), height=0)
+
+    if job.transcript:
+        st.markdown(f"**🗣️ You:** {job.transcript}")
+    if job.sentences:
+        st.markdown(f"**🤖 Assistant:** {' '.join(job.sentences)}")
+
+    if not job.finished:
+        if job.state == "queued":
+            st.info("⏳ Waiting for a free slot...")
+        elif job.transcript is None:
+            st.info("🎤 Transcribing...")
+        else:
+            st.info("🤔 Thinking...")
+        return
+    if new_clips:
+        return  # let the last clip reach the play queue before the fragment goes away
+
+    st.session_state.voice_job = None
+    if job.state == "done":
+        if job.transcript and job.transcript.strip() and job.result:
+            history = st.session_state.conversation_history
+            history.append({"role": "user", "content": job.transcript})
+            history.append({"role": "assistant", "content": job.result["text"]})
+            # older turns live in the store and the summary; the session keeps a bounded window
+            context.trim(history, HISTORY_WINDOW)
+            # fold turns that left the window into the summary, off the critical path
+            context.after_turn(client, history)
+            # Persist both turns with their audio (MP3 clips concatenate into one playable stream)
+            cid = job.meta["conversation_id"]
+            user_seq = store.append(cid, "user", job.transcript, *job.meta["user_audio"])
+            st.session_state.reply_seq = store.append(cid, "assistant", job.result["text"],
+                                                      b"".join(job.clips), "audio/mpeg")
+            if cid == st.session_state.conversation_id:
+                st.session_state.history_turns += [
+                    {"seq": user_seq, "role": "user", "content": job.transcript, "has_audio": True},
+                    {"seq": st.session_state.reply_seq, "role": "assistant", "content": job.result["text"],
+                     "has_audio": bool(job.clips)}]
+            if cid == st.session_state.conversation_id and not st.session_state.get("conversation_saved", True):
+                st.session_state.conversation_saved = True   # first turn: now it can be linked
+                st.query_params["c"] = cid
+            # Verbs used wrongly (or a lot) go to the Conjugations practice deck; local dict lookups only
+            index = form_index.get_index(wait=False)
+            if index is not None:
+                hits = index.analyze(job.transcript)
+                items = form_index.drill_items(index, hits, st.session_state.voice_verb_counts)
+                form_index.add_to_deck(st.session_state.practice_deck, items)
+                st.session_state.last_turn_mistakes = [
+                    f"{h['person']} {h['said']} → {h['expected']}" for h in hits if not h["ok"] and h["expected"]]
+        else:
+            st.session_state.status_message = "no_speech"
+    elif job.state == "error":
+        # Handle specific OpenAI errors
+        error_msg = str(job.error)
+        if "audio_too_short" in error_msg or "too short" in error_msg:
+            st.session_state.status_message = "too_short"
+        elif "401" in error_msg or "Unauthorized" in error_msg or "invalid_api_key" in error_msg:
+            st.session_state.status_message = "invalid_key"
+        else:
+            st.session_state.status_message = "error"
+    # Rerun the whole page to show the new history and replay control
+    st.rerun()
+
+# Handle a new recording: prepare it here (local and quick), run the turn in the background
 if audio_bytes:
-    # Check if this is a new recording (not the same as last time)
-    if st.session_state.last_audio_bytes != audio_bytes and not st.session_state.get("processing", False):
-        st.session_state.last_audio_bytes = audio_bytes
-        st.session_state.processing = True
+    # Check if this is a new recording (a short digest, so reruns don't compare whole recordings)
+    digest = audio_digest(audio_bytes)
+    if st.session_state.last_audio_digest != digest:
+        st.session_state.last_audio_digest = digest
         st.session_state.status_message = None
-        
+        # the previous reply's audio is replaced by this turn's
+        st.session_state.reply_seq = None
+        st.session_state.last_turn_mistakes = []
+
+        # Recording again replaces a turn that is still running
+        job = st.session_state.voice_job
+        if job is not None and not job.finished:
+            job.cancel()
+            components.html(audio_queue_html(clear=True), height=0)
+        st.session_state.voice_job = None
+
         # Check if audio is long enough (minimum 0.1 seconds = ~3200 bytes at 16kHz)
         if len(audio_bytes) < 3200:
             st.session_state.status_message = "too_short"
-            st.session_state.processing = False
         else:
-            # Save audio to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-                tmp_file.write(audio_bytes)
-                audio_file_path = tmp_file.name
-            
-            try:
-                # Show success status
+            # Trim silence, downmix and resample to 16 kHz locally; silence never reaches the API
+            prepared = prepare_recording(audio_bytes, compress=True)
+            if prepared["silent"]:
+                st.session_state.status_message = "no_speech"
+            else:
                 with status_container:
                     st.success("✅ Audio recorded!")
-                
-                # Transcribe audio
-                with st.spinner("🎤 Transcribing..."):
-                    with open(audio_file_path, "rb") as audio_file:
-                        transcription = client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file,
-                            language="fr"
-                        )
-                
-                user_text = transcription.text
-                
-                # Only add to history if transcription is not empty
-                if user_text.strip():
-                    st.session_state.conversation_history.append({
-                        "role": "user",
-                        "content": user_text
-                    })
-                    
-                    # Get response from GPT
-                    messages = [
-                        {"role": "system", "content": system_prompt}
-                    ] + st.session_state.conversation_history
-                    
-                    with st.spinner("🤔 Thinking..."):
-                        response = client.chat.completions.create(
-                            model=model_option,
-                            messages=messages,
-                            max_tokens=500
-                        )
-                    
-                    assistant_text = response.choices[0].message.content
-                    st.session_state.conversation_history.append({
-                        "role": "assistant",
-                        "content": assistant_text
-                    })
-                    
-                    # Generate speech
-                    with st.spinner("🔊 Generating speech..."):
-                        speech_response = client.audio.speech.create(
-                            model="tts-1",
-                            voice=voice_option,
-                            input=assistant_text,
-                            speed=1.0
-                        )
-                        
-                        # Store audio response
-                        st.session_state.audio_response = speech_response.content
-                    
-                    # Mark processing complete
-                    st.session_state.processing = False
-                    
-                    # Force rerun to show results immediately
-                    st.rerun()
-                else:
-                    st.session_state.status_message = "no_speech"
-                    st.session_state.processing = False
-                
-                # Clean up temp file
-                os.unlink(audio_file_path)
-                
-            except Exception as e:
-                st.session_state.processing = False
-                
-                # Handle specific OpenAI errors
-                error_msg = str(e)
-                if "audio_too_short" in error_msg or "too short" in error_msg:
-                    st.session_state.status_message = "too_short"
-                elif "401" in error_msg or "Unauthorized" in error_msg or "invalid_api_key" in error_msg:
-                    st.session_state.status_message = "invalid_key"
-                else:
-                    st.session_state.status_message = "error"
-                
-                if os.path.exists(audio_file_path):
-                    os.unlink(audio_file_path)
-        
-        # Show status message if needed
-        if st.session_state.status_message:
-            with status_container:
-                if st.session_state.status_message == "too_short":
-                    st.warning("⚠️ Audio too short (min 0.1s)")
-                elif st.session_state.status_message == "no_speech":
-                    st.warning("⚠️ No speech detected")
-                elif st.session_state.status_message == "invalid_key":
-                    st.error("❌ Invalid API key")
-                else:
-                    st.error("❌ Processing error")
+                # the worker sees a snapshot; history itself is only updated by turn_progress()
+                history = list(st.session_state.conversation_history)
+
+                def build_messages(user_text):
+                    return context.build_messages(system_prompt, history + [{"role": "user", "content": user_text}])
+
+                # Transcribe (uploaded from memory), then stream the reply and play it sentence by sentence
+                upload = as_upload(prepared["data"], prepared["name"])
+                turn = dict(model=model_option, voice=voice_option)
+                user_audio = (prepared["data"], "audio/flac" if prepared["name"].endswith(".flac") else "audio/wav")
+                st.session_state.voice_job = voice_jobs.submit(
+                    lambda: voice_turn(client, upload, build_messages, **turn),
+                    conversation_id=st.session_state.conversation_id, user_audio=user_audio)
+
+with status_container:
+    if st.session_state.voice_job is not None:
+        turn_progress()   # polls only while a turn is pending
+
+    # Show status message if needed
+    if st.session_state.status_message:
+        if st.session_state.status_message == "too_short":
+            st.warning("⚠️ Audio too short (min 0.1s)")
+        elif st.session_state.status_message == "no_speech":
+            st.warning("⚠️ No speech detected")
+        elif st.session_state.status_message == "invalid_key":
+            st.error("❌ Invalid API key")
+        else:
+            st.error("❌ Processing error")
 
 st.caption("💡 **Tip:** The AI is here to help you practice! Don't worry about mistakes - they're part of learning.")
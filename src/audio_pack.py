@@ -0,0 +1,227 @@
+# audio_pack.py
+"""
+Offline audio pack: every conjugated form in the Solutions sheet, pre-synthesized
+into one indexed file that the Conjugations page memory-maps.
+
+Layout (little-endian):
+    b"FVAPACK1" | u64 index_len | index JSON | clip bytes ...
+The index maps "row:col" -> [offset, length, text], offsets relative to the
+first clip byte. Playing a form is a dict lookup plus an mmap slice; nothing
+touches the network during practice.
+
+    python -m src.audio_pack build --backend openai     # real voices (needs OPENAI_API_KEY)
+    python -m src.audio_pack build --backend stub       # local test tones, no API
+    python -m src.audio_pack info
+"""
+
+import os, io, sys, json, math, mmap, wave, struct, hashlib, argparse, threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+from src import config as con
+
+PACK_PATH = Path(__file__).resolve().parents[1] / "data" / "audio_pack.bin"
+MAGIC     = b"FVAPACK1"
+_HEADER   = struct.Struct("<8sQ")
+CHECKPOINT_EVERY = 500   # new clips between intermediate pack writes during a build
+
+# ---------- Backends ----------
+class StubBackend:
+    """Local stand-in: a short tone per form (pitch from the text's hash), as 8 kHz 8-bit WAV."""
+    name, mime = "stub", "audio/wav"
+
+    def __init__(self, seconds: float = 0.4, sr: int = 8000):
+        self.seconds, self.sr = seconds, sr
+
+    def synthesize(self, text: str) -> bytes:
+        f0 = 220 + int(hashlib.md5(text.encode("utf-8")).hexdigest()[:4], 16) % 440
+        n = int(self.seconds * self.sr)
+        frames = bytes(128 + int(60 * math.sin(2 * math.pi * f0 * i / self.sr)) for i in range(n))
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1); w.setsampwidth(1); w.setframerate(self.sr)
+            w.writeframes(frames)
+        return buf.getvalue()
+
+class OpenAIBackend:
+    """OpenAI TTS encoded as Opus (about a third of the size of the default MP3)."""
+    name, mime = "openai", "audio/ogg"
+
+    def __init__(self, voice: str = "nova", model: str = "tts-1", client=None):
+        from src.openai_clients import get_client
+        self.voice, self.model = voice, model
+        self.client = client or get_client()
+
+    def synthesize(self, text: str) -> bytes:
+        return self.client.audio.speech.create(model=self.model, voice=self.voice, input=text,
+                                               response_format="opus").content
+
+BACKENDS = {"stub": StubBackend, "openai": OpenAIBackend}
+
+# ---------- Source forms ----------
+def iter_forms(excel_file: str = con.EXCEL_FILE):
+    """Yield (row, col, text) for every non-empty conjugation cell in the Solutions sheet."""
+    wb = load_workbook(excel_file, read_only=True, data_only=True)
+    ws = wb["Solutions"]
+    cols = [(c, column_index_from_string(c) - 1) for c in con.CONJUGATION_COLS]
+    for row, values in enumerate(ws.iter_rows(min_row=con.START_ROW, values_only=True), start=con.START_ROW):
+        for col, idx in cols:
+            v = values[idx] if idx < len(values) else None
+            if v is not None and str(v).strip() and str(v).strip() != "-":   # "-": no such form
+                yield row, col, str(v).strip()
+    wb.close()
+
+# ---------- Pack file ----------
+class AudioPack:
+    """Read side: the index in memory, the clips memory-mapped."""
+    def __init__(self, path: Path = PACK_PATH):
+        self.path = Path(path)
+        self._f = open(self.path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not an audio pack")
+        meta = json.loads(self._mm[_HEADER.size:_HEADER.size + n])
+        self.mime = meta["mime"]
+        self.meta = {k: v for k, v in meta.items() if k != "entries"}
+        self.entries = meta["entries"]
+        self._base = _HEADER.size + n
+
+    def get(self, row: int, col: str, text: str | None = None) -> bytes | None:
+        """Clip for a cell; None if missing or built from different text (the sheet changed since)."""
+        e = self.entries.get(f"{row}:{col}")
+        if e is None or (text is not None and e[2] != text):
+            return None
+        off, length = self._base + e[0], e[1]
+        return self._mm[off:off + length]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        self._mm.close(); self._f.close()
+
+def write_pack(path: Path, clips: dict, meta: dict):
+    """clips: {(row, col): (text, bytes)}; written to a temp file, then swapped in."""
+    entries, off = {}, 0
+    order = sorted(clips)
+    for key in order:
+        text, data = clips[key]
+        entries[f"{key[0]}:{key[1]}"] = [off, len(data), text]
+        off += len(data)
+    index = json.dumps({**meta, "entries": entries}, ensure_ascii=False).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(index)))
+        f.write(index)
+        for key in order:
+            f.write(clips[key][1])
+    os.replace(tmp, path)
+
+def build(backend, out: Path = PACK_PATH, workers: int = 4, limit: int | None = None,
+          excel_file: str = con.EXCEL_FILE) -> list[tuple]:
+    """Synthesize all forms; clips whose text and backend are unchanged are reused from the existing pack.
+
+    A form that fails (429, timeout ...) is reported and left out; everything else is
+    still written, and the pack is checkpointed every CHECKPOINT_EVERY clips, so a
+    rerun only synthesizes what is missing. Returns the failed (row, col, text).
+    """
+    forms = list(iter_forms(excel_file))
+    if limit:
+        forms = forms[:limit]
+    meta = {"mime": backend.mime, "backend": backend.name, "voice": getattr(backend, "voice", None)}
+    old = None
+    if out.exists():
+        try:
+            old = AudioPack(out)
+            if {k: old.meta.get(k) for k in meta} != meta:
+                old.close(); old = None   # different voice/backend: rebuild everything
+        except ValueError:
+            old = None
+    clips, todo = {}, []
+    for row, col, text in forms:
+        data = old.get(row, col, text) if old else None
+        if data is not None:
+            clips[(row, col)] = (text, bytes(data))
+        else:
+            todo.append((row, col, text))
+    if old:
+        old.close()
+    print(f"🔊 {len(forms)} forms: {len(clips)} reused, {len(todo)} to synthesize with '{backend.name}'")
+
+    lock, done, failed = threading.Lock(), [0], []
+    def work(item):
+        row, col, text = item
+        try:
+            data = backend.synthesize(text)
+        except Exception as e:
+            with lock:
+                failed.append(item)
+            print(f"  ✗ {row}:{col} {text!r}: {e}")
+            return
+        with lock:
+            clips[(row, col)] = (text, data)
+            done[0] += 1
+            if done[0] % 100 == 0 or done[0] == len(todo):
+                print(f"  {done[0]}/{len(todo)}")
+            if done[0] % CHECKPOINT_EVERY == 0:
+                write_pack(out, clips, meta)   # what's paid for survives a crash or Ctrl-C
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(work, todo):
+            pass
+    write_pack(out, clips, meta)
+    size = out.stat().st_size
+    print(f"✅ wrote {out} ({len(clips)} clips, {size / 1e6:.1f} MB)")
+    if failed:
+        failed.sort()
+        keys = ", ".join(f"{r}:{c}" for r, c, _ in failed[:20]) + (" ..." if len(failed) > 20 else "")
+        print(f"⚠️ {len(failed)} form(s) failed and are missing from the pack: {keys}")
+        print("   Run the build again to synthesize only those.")
+    return failed
+
+# ---------- Shared reader ----------
+_pack = None
+_pack_lock = threading.Lock()
+
+def get_pack(path: Path = PACK_PATH) -> AudioPack | None:
+    """Process-wide pack, opened on first use; None if it hasn't been built."""
+    global _pack
+    with _pack_lock:
+        if _pack is None and Path(path).exists():
+            _pack = AudioPack(path)
+        return _pack
+
+# -------------- CLI ----------------
+def main():
+    p = argparse.ArgumentParser(description="Build or inspect the offline conjugation audio pack")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Synthesize every form in the Solutions sheet into the pack")
+    b.add_argument("--backend", choices=sorted(BACKENDS), default="openai")
+    b.add_argument("--voice", default="nova", help="TTS voice (openai backend)")
+    b.add_argument("--out", type=Path, default=PACK_PATH)
+    b.add_argument("--workers", type=int, default=4)
+    b.add_argument("--limit", type=int, default=None, help="Only the first N forms (for trying it out)")
+    i = sub.add_parser("info", help="Show what a pack contains")
+    i.add_argument("--path", type=Path, default=PACK_PATH)
+    a = p.parse_args()
+
+    if a.cmd == "build":
+        if a.backend == "openai":
+            if not os.getenv("OPENAI_API_KEY"):
+                sys.exit("Error: OPENAI_API_KEY is not set (or use --backend stub)")
+            backend = OpenAIBackend(voice=a.voice)
+        else:
+            backend = StubBackend()
+        if build(backend, a.out, workers=a.workers, limit=a.limit):
+            sys.exit(1)
+    else:
+        pack = AudioPack(a.path)
+        sizes = [e[1] for e in pack.entries.values()]
+        print(f"{a.path}: {len(pack)} clips, {pack.meta}, "
+              f"{sum(sizes) / 1e6:.1f} MB audio, avg {sum(sizes) / max(1, len(sizes)) / 1e3:.1f} kB/clip")
+        pack.close()
+
+if __name__ == "__main__":
+    main()
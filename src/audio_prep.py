@@ -0,0 +1,117 @@
+# audio_prep.py
+"""
+Clean up a recorder WAV before it is sent to whisper.
+
+Downmix to mono, resample to 16 kHz (whisper's native rate), trim leading and
+trailing silence, normalize the level, and optionally encode FLAC (needs
+`pip install soundfile`). A 5 s 48 kHz stereo take shrinks about 6x as WAV
+and more as FLAC, and recordings with no speech at all are rejected locally,
+without an API round trip.
+"""
+
+import io, wave
+import numpy as np
+from src.resample import Resampler
+
+TARGET_SR      = 16000
+FRAME_MS       = 20
+PAD_MS         = 150     # kept around the detected speech so word edges aren't clipped
+MIN_SPEECH_MS  = 150     # less voiced audio than this counts as "no speech"
+SPEECH_DB      = 12.0    # frame level above the noise floor that counts as speech
+MIN_PEAK_DBFS  = -45.0   # quieter than this everywhere: silence, whatever the floor
+LOUD_DBFS      = -30.0   # louder than this is speech even without quieter frames to compare to
+TARGET_PEAK    = 0.7     # ~-3 dBFS after normalization
+MAX_GAIN       = 10.0    # +20 dB at most, so we don't blow up hiss
+RESAMPLE_BLOCK_S = 0.5   # resampled in blocks: the work arrays scale with the block, not the take
+
+def read_wav(data: bytes) -> tuple[np.ndarray, int]:
+    """Samples as float32 in [-1, 1], shape (frames, channels), and the sample rate."""
+    with wave.open(io.BytesIO(data), "rb") as w:
+        sr, ch, width = w.getframerate(), w.getnchannels(), w.getsampwidth()
+        raw = w.readframes(w.getnframes())
+    if width == 1:
+        x = (np.frombuffer(raw, np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        x = np.frombuffer(raw, "<i2").astype(np.float32) / 32768
+    elif width == 3:
+        b = np.frombuffer(raw, np.uint8).reshape(-1, 3)
+        x = ((b[:, 0].astype(np.int32) << 8 | b[:, 1].astype(np.int32) << 16 | b[:, 2].astype(np.int32) << 24) >> 8)
+        x = x.astype(np.float32) / 8388608
+    elif width == 4:
+        x = np.frombuffer(raw, "<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"unsupported sample width {width}")
+    return x.reshape(-1, ch), sr
+
+def to_pcm16(x: np.ndarray) -> bytes:
+    return (np.clip(x, -1, 1) * 32767).astype("<i2").tobytes()
+
+def write_wav(pcm16: bytes, sr: int) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(sr)
+        w.writeframes(pcm16)
+    return buf.getvalue()
+
+def encode_flac(pcm16: bytes, sr: int) -> bytes | None:
+    try:
+        import soundfile as sf  # pip install soundfile
+    except ImportError:
+        return None
+    buf = io.BytesIO()
+    sf.write(buf, np.frombuffer(pcm16, "<i2"), sr, format="FLAC", subtype="PCM_16")
+    return buf.getvalue()
+
+def speech_bounds(x: np.ndarray, sr: int) -> tuple[int, int, float]:
+    """(start, end) sample range of the speech (padded) and voiced milliseconds; (0, 0, 0) if none."""
+    n = int(sr * FRAME_MS / 1000)
+    frames = len(x) // n
+    if frames == 0:
+        return 0, 0, 0.0
+    rms = np.sqrt(np.mean(x[:frames * n].reshape(frames, n) ** 2, axis=1) + 1e-12)
+    db = 20 * np.log10(rms)
+    floor = np.percentile(db, 10)
+    voiced = ((db > floor + SPEECH_DB) & (db > MIN_PEAK_DBFS)) | (db > LOUD_DBFS)
+    if not voiced.any():
+        return 0, 0, 0.0
+    idx = np.flatnonzero(voiced)
+    pad = int(PAD_MS / FRAME_MS)
+    start = max(0, idx[0] - pad) * n
+    end = min(len(x), (idx[-1] + 1 + pad) * n)
+    return start, end, float(voiced.sum() * FRAME_MS)
+
+def prepare_recording(data: bytes, target_sr: int = TARGET_SR, compress: bool = False) -> dict:
+    """Preprocess a WAV recording for transcription.
+
+    Returns {"data", "name", "silent", "speech_ms", "in_bytes", "out_bytes"}.
+    Input that can't be parsed is passed through unchanged.
+    """
+    info = {"in_bytes": len(data), "silent": False, "speech_ms": None}
+    try:
+        x, sr = read_wav(data)
+    except (wave.Error, ValueError, EOFError) as e:
+        print(f"[audio_prep] passing recording through unprocessed: {e}")
+        return {**info, "data": data, "name": "recording.wav", "out_bytes": len(data)}
+
+    mono = x.mean(axis=1) if x.shape[1] > 1 else x[:, 0]
+    pcm = to_pcm16(mono)
+    if sr != target_sr:
+        block = int(sr * RESAMPLE_BLOCK_S)
+        rs, view = Resampler(sr, target_sr, block_frames=block), memoryview(pcm)
+        pcm = b"".join(rs.process(view[i:i + 2 * block]) for i in range(0, len(view), 2 * block))
+    y = np.frombuffer(pcm, "<i2").astype(np.float32) / 32768
+
+    start, end, speech_ms = speech_bounds(y, target_sr)
+    info["speech_ms"] = speech_ms
+    if speech_ms < MIN_SPEECH_MS:
+        return {**info, "silent": True, "data": b"", "name": "", "out_bytes": 0}
+    y = y[start:end]
+    peak = float(np.abs(y).max())
+    if peak > 0:
+        y = y * min(MAX_GAIN, TARGET_PEAK / peak)
+    pcm = to_pcm16(y)
+
+    out = encode_flac(pcm, target_sr) if compress else None
+    name = "speech.flac" if out else "speech.wav"
+    out = out or write_wav(pcm, target_sr)
+    return {**info, "data": out, "name": name, "out_bytes": len(out)}
@@ -0,0 +1,134 @@
+# conversation_store.py
+"""
+SQLite store for Voice Chat conversations.
+
+Turns are append-only rows (conversation id, sequence number, role, text) with
+the turn's audio as an optional blob: the user's prepared recording and the
+assistant's reply clips. Uncompressed audio (WAV) is zlib-packed; MP3/FLAC is
+stored as is. Listing queries never read the audio column, so the page can
+page through long conversations cheaply and fetch a clip only when it is played.
+
+The conversation id travels in the page URL (?c=...), so a refresh or a second
+tab shows the same conversation. A conversation row is only written with its
+first turn, so sessions that never say anything leave nothing behind.
+"""
+
+import os, time, uuid, zlib, sqlite3, threading
+from pathlib import Path
+
+DB_PATH   = Path(os.getenv("CONVERSATION_DB", Path(__file__).resolve().parents[1] / "data" / "conversations.sqlite"))
+PAGE_SIZE = 10     # turns per page in the Full Conversation expander
+MIN_SAVING = 0.9   # zlib is kept only if it gets the blob under 90% of its size
+
+class ConversationStore:
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()   # seq numbers are assigned under it
+        con = self._connect()
+        con.execute("""
+        CREATE TABLE IF NOT EXISTS conversations (
+          id TEXT PRIMARY KEY,
+          created_ts REAL
+        )""")
+        con.execute("""
+        CREATE TABLE IF NOT EXISTS turns (
+          conversation_id TEXT,
+          seq INTEGER,
+          role TEXT,
+          content TEXT,
+          audio BLOB,
+          audio_mime TEXT,
+          audio_zlib INTEGER DEFAULT 0,
+          created_ts REAL,
+          PRIMARY KEY (conversation_id, seq)
+        )""")
+        con.commit(); con.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # one short-lived connection per call: Streamlit runs each rerun on a different thread
+        con = sqlite3.connect(self.path, timeout=10)
+        con.execute("PRAGMA journal_mode=WAL;")
+        con.execute("PRAGMA synchronous=NORMAL;")
+        return con
+
+    # ---------- Conversations ----------
+    def new_conversation(self) -> str:
+        """A fresh id; the conversation is stored by its first append()."""
+        return uuid.uuid4().hex[:16]
+
+    def exists(self, cid: str) -> bool:
+        con = self._connect()
+        row = con.execute("SELECT 1 FROM conversations WHERE id=?", (cid,)).fetchone()
+        con.close()
+        return row is not None
+
+    # ---------- Turns ----------
+    def append(self, cid: str, role: str, content: str, audio: bytes | None = None,
+               mime: str | None = None) -> int:
+        """Add a turn; returns its sequence number."""
+        packed = 0
+        if audio and mime == "audio/wav":
+            z = zlib.compress(audio, 6)
+            if len(z) < len(audio) * MIN_SAVING:
+                audio, packed = z, 1
+        with self._write_lock:
+            con = self._connect()
+            with con:
+                con.execute("INSERT OR IGNORE INTO conversations (id, created_ts) VALUES (?, ?)", (cid, time.time()))
+                seq = con.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM turns WHERE conversation_id=?",
+                                  (cid,)).fetchone()[0]
+                con.execute("INSERT INTO turns (conversation_id, seq, role, content, audio, audio_mime, audio_zlib, created_ts) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (cid, seq, role, content, audio, mime if audio else None, packed, time.time()))
+            con.close()
+        return seq
+
+    def count(self, cid: str) -> int:
+        con = self._connect()
+        n = con.execute("SELECT COUNT(*) FROM turns WHERE conversation_id=?", (cid,)).fetchone()[0]
+        con.close()
+        return n
+
+    def page(self, cid: str, before: int | None = None, limit: int = PAGE_SIZE) -> list[dict]:
+        """Up to `limit` turns with seq < before (default: the newest), oldest first; no audio."""
+        con = self._connect()
+        rows = con.execute(
+            "SELECT seq, role, content, audio IS NOT NULL FROM turns "
+            "WHERE conversation_id=? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (cid, before if before is not None else 2**62, limit)).fetchall()
+        con.close()
+        return [{"seq": s, "role": r, "content": c, "has_audio": bool(a)} for s, r, c, a in reversed(rows)]
+
+    def messages(self, cid: str, limit: int) -> list[dict]:
+        """The newest `limit` turns as chat messages, to rebuild the context after a refresh."""
+        return [{"role": t["role"], "content": t["content"]} for t in self.page(cid, limit=limit)]
+
+    def audio(self, cid: str, seq: int) -> tuple[bytes, str] | None:
+        con = self._connect()
+        row = con.execute("SELECT audio, audio_mime, audio_zlib FROM turns WHERE conversation_id=? AND seq=?",
+                          (cid, seq)).fetchone()
+        con.close()
+        if row is None or row[0] is None:
+            return None
+        data = zlib.decompress(row[0]) if row[2] else bytes(row[0])
+        return data, row[1]
+
+    def last_audio_seq(self, cid: str, role: str = "assistant") -> int | None:
+        """Sequence number of the newest turn by `role` that has audio."""
+        con = self._connect()
+        row = con.execute("SELECT seq FROM turns WHERE conversation_id=? AND role=? AND audio IS NOT NULL "
+                          "ORDER BY seq DESC LIMIT 1", (cid, role)).fetchone()
+        con.close()
+        return row[0] if row else None
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store() -> ConversationStore:
+    """Process-wide store (the schema is checked once)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConversationStore()
+        return _store
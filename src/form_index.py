@@ -0,0 +1,198 @@
+# form_index.py
+"""
+Reverse index of the Solutions sheet: conjugated form -> (row, col, verb, tense, person).
+
+Built once per process (a few seconds with openpyxl, in a background thread)
+and then a plain dict, so looking up every word of a voice-chat transcript
+costs microseconds and needs no network. analyze() finds verb forms that
+follow a subject pronoun, and flags the ones that don't agree with it
+("je parles"). drill_items() turns those findings into tasks for the
+Conjugations page's practice deck.
+"""
+
+import re, threading, unicodedata
+from collections import Counter
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+from src import config as con
+
+MAX_FORM_WORDS = 3     # longest form looked up, in words ("me suis levé")
+FREQUENT_USES  = 3     # a verb+tense used this often gets another person queued
+DECK_MAX       = 30
+
+# subject pronouns, and the clitics that may sit between a subject and its verb
+PERSONS = {"je": "je", "j'": "je", "tu": "tu", "il": "il", "elle": "il", "on": "il",
+           "nous": "nous", "vous": "vous", "ils": "ils", "elles": "ils"}
+_CLITICS = {"ne", "n'", "me", "m'", "te", "t'", "se", "s'", "le", "la", "les", "l'",
+            "lui", "leur", "y", "en", "nous", "vous"}
+_LEADING = _CLITICS | set(PERSONS) | {"que", "qu'"}   # stripped from sheet cells ("que je parle")
+_WORD = re.compile(r"[a-zàâäçéèêëîïôöûùüÿœæ]+'?")
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFC", str(text)).lower()
+    return text.replace("’", "'").replace("`", "'")
+
+def tokenize(text: str) -> list[str]:
+    """Words, with elided ones kept as "j'", "qu'", "n'" ... ("j'ai" -> ["j'", "ai"])."""
+    return _WORD.findall(normalize(text))
+
+def person_of(subject) -> str | None:
+    """'je', 'il (elle, on)', 'ils/elles' ... -> je/tu/il/nous/vous/ils; None for non-person columns."""
+    words = tokenize(subject or "")
+    return PERSONS.get(words[0]) if words else None
+
+class FormIndex:
+    def __init__(self, cells: dict, verbs: dict, headers: dict):
+        """cells {(row, col): text}, verbs {row: infinitive}, headers {col: (tense, subject)}."""
+        self.cells, self.verbs, self.headers = cells, verbs, headers
+        self.forms = {}        # form -> [(row, col, verb, tense, person), ...], most common verbs first
+        self.by_tense = {}     # (row, tense) -> {person: col}
+        imperative = set(con.IMPERATIF_COLS)
+        for (row, col), text in sorted(cells.items()):
+            tense, subject = headers.get(col, (None, None))
+            words = tokenize(text)
+            k = 0
+            while k < len(words) - 1 and words[k] in _LEADING:
+                k += 1
+            person = person_of(subject) or next((PERSONS[w] for w in words[:k] if w in PERSONS), None)
+            if col in imperative:
+                person = None  # no subject pronoun in front of an imperative
+            form = words[k:]
+            if not form:
+                continue
+            entry = (row, col, verbs.get(row), tense, person)
+            self.forms.setdefault(" ".join(form), []).append(entry)
+            if person:
+                self.by_tense.setdefault((row, tense), {})[person] = col
+
+    def __len__(self):
+        return len(self.forms)
+
+    def lookup(self, form: str) -> list[tuple]:
+        return self.forms.get(" ".join(tokenize(form)), [])
+
+    def _subject(self, words: list[str], i: int) -> str | None:
+        """Subject person of the verb starting at words[i]: the farthest pronoun in the clitic run before it."""
+        person, j = None, i - 1
+        while j >= 0 and (words[j] in _CLITICS or words[j] in PERSONS):
+            if words[j] in PERSONS:
+                person = PERSONS[words[j]]
+            j -= 1
+        return person
+
+    def analyze(self, text: str) -> list[dict]:
+        """Verb forms used after a subject pronoun.
+
+        Each hit: {"said", "person", "row", "col", "verb", "tense", "ok", "expected_col", "expected"}.
+        When the form doesn't fit the pronoun, the entry is the verb's most common reading and
+        expected_col/expected name the cell the speaker needed.
+        """
+        words, hits, i = tokenize(text), [], 0
+        while i < len(words):
+            for n in range(min(MAX_FORM_WORDS, len(words) - i), 0, -1):
+                entries = self.forms.get(" ".join(words[i:i + n]))
+                if entries:
+                    break
+            else:
+                i += 1
+                continue
+            person = self._subject(words, i)
+            finite = [e for e in entries if e[4]]
+            if person and finite:
+                match = next((e for e in finite if e[4] == person), None)
+                row, col, verb, tense, _ = match or finite[0]
+                hit = {"said": " ".join(words[i:i + n]), "person": person, "row": row, "col": col,
+                       "verb": verb, "tense": tense, "ok": match is not None,
+                       "expected_col": None, "expected": None}
+                if match is None:
+                    exp = self.by_tense.get((row, tense), {}).get(person)
+                    if exp:
+                        hit["expected_col"], hit["expected"] = exp, self.cells[(row, exp)]
+                hits.append(hit)
+            i += n
+        return hits
+
+def drill_items(index: FormIndex, hits: list[dict], counts: Counter) -> list[dict]:
+    """Practice tasks from one turn's hits; counts ((row, tense) -> uses) is updated in place.
+
+    A mistake queues the cell the speaker needed. A verb+tense used FREQUENT_USES
+    times queues the same tense for a person they haven't been using.
+    """
+    items = []
+    for h in hits:
+        if not h["ok"]:
+            if h["expected_col"]:
+                items.append({"row": h["row"], "col": h["expected_col"], "verb": h["verb"],
+                              "reason": f"you said “{h['person']} {h['said']}”"})
+            continue
+        key = (h["row"], h["tense"])
+        counts[key] += 1
+        if counts[key] % FREQUENT_USES == 0:
+            others = [c for p, c in index.by_tense.get(key, {}).items() if p != h["person"]]
+            if others:
+                col = others[(counts[key] // FREQUENT_USES - 1) % len(others)]
+                items.append({"row": h["row"], "col": col, "verb": h["verb"],
+                              "reason": f"you use “{h['verb']}” often"})
+    return items
+
+def add_to_deck(deck: list[dict], items: list[dict]) -> int:
+    """Append new tasks (no duplicate cells), keeping the newest DECK_MAX; returns how many were added."""
+    queued = {(d["row"], d["col"]) for d in deck}
+    added = 0
+    for item in items:
+        if (item["row"], item["col"]) not in queued:
+            deck.append(item); queued.add((item["row"], item["col"])); added += 1
+    del deck[:-DECK_MAX]
+    return added
+
+# ---------- Building ----------
+def build_index(excel_file: str = con.EXCEL_FILE) -> FormIndex:
+    wb = load_workbook(excel_file, read_only=True, data_only=True)
+    ws = wb["Solutions"]
+    cols = [(c, column_index_from_string(c) - 1) for c in con.CONJUGATION_COLS]
+    verb_idx = column_index_from_string(con.VERB_COL) - 1
+    cells, verbs, headers = {}, {}, {}
+    rows = ws.iter_rows(values_only=True)
+    tenses, subjects = next(rows, ()), next(rows, ())
+    for col, idx in cols:
+        headers[col] = (tenses[idx] if idx < len(tenses) else None, subjects[idx] if idx < len(subjects) else None)
+    for row, values in enumerate(rows, start=3):
+        if row < con.START_ROW:
+            continue
+        verbs[row] = values[verb_idx] if verb_idx < len(values) else None
+        for col, idx in cols:
+            v = values[idx] if idx < len(values) else None
+            if v is not None and str(v).strip() and str(v).strip() != "-":
+                cells[(row, col)] = str(v).strip()
+    wb.close()
+    return FormIndex(cells, verbs, headers)
+
+# ---------- Shared index ----------
+_index = None
+_index_lock = threading.Lock()
+_loading = None
+
+def get_index(wait: bool = True) -> FormIndex | None:
+    """Process-wide index. With wait=False, None until the background build (preload()) is done."""
+    global _index
+    if _index is not None or not wait:
+        return _index
+    with _index_lock:
+        if _index is None:
+            _index = build_index()
+            print(f"[form_index] {len(_index)} forms indexed")
+        return _index
+
+def preload():
+    """Start building the index in the background (once per process)."""
+    global _loading
+    with _index_lock:
+        if _index is not None or _loading is not None:
+            return
+        def load():
+            try:
+                get_index()
+            except Exception as e:
+                print(f"[form_index] could not build the form index: {e}")
+        _loading = threading.Thread(target=load, name="form-index", daemon=True)
+        _loading.start()
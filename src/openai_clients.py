@@ -0,0 +1,67 @@
+# openai_clients.py
+"""
+Process-wide OpenAI clients.
+
+One client per API key, created on first use and reused by every Streamlit
+session and rerun. All of them share a single httpx connection pool with
+keep-alive, so a voice turn reuses warm TLS connections instead of
+handshaking again. Timeouts and retries are set here (env overrides below).
+
+Tests and benchmarks inject a stand-in with set_client(fake); set_client(None)
+goes back to real clients.
+"""
+
+import os, threading
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+
+TIMEOUT_S         = float(os.getenv("OPENAI_TIMEOUT_S", "60"))   # per read; streamed replies reset it per chunk
+CONNECT_TIMEOUT_S = float(os.getenv("OPENAI_CONNECT_TIMEOUT_S", "5"))
+MAX_RETRIES       = int(os.getenv("OPENAI_MAX_RETRIES", "2"))     # SDK retries (429, 5xx, connection errors)
+MAX_CONNECTIONS   = 32
+KEEPALIVE         = 16      # idle connections kept open
+KEEPALIVE_S       = 120     # how long an idle connection is kept
+
+_lock = threading.Lock()
+_http = None        # shared httpx pool
+_clients = {}       # (api_key, max_retries) -> OpenAI
+_override = None    # injected stand-in
+
+def _http_client() -> httpx.Client:
+    global _http
+    if _http is None:
+        _http = DefaultHttpxClient(
+            timeout=httpx.Timeout(TIMEOUT_S, connect=CONNECT_TIMEOUT_S),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=KEEPALIVE,
+                                keepalive_expiry=KEEPALIVE_S),
+        )
+    return _http
+
+def get_client(api_key: str | None = None, max_retries: int = MAX_RETRIES):
+    """Cached client for api_key (default: OPENAI_API_KEY), or the injected stand-in."""
+    if _override is not None:
+        return _override
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    with _lock:
+        client = _clients.get((api_key, max_retries))
+        if client is None:
+            client = OpenAI(api_key=api_key, http_client=_http_client(),
+                            timeout=httpx.Timeout(TIMEOUT_S, connect=CONNECT_TIMEOUT_S), max_retries=max_retries)
+            _clients[(api_key, max_retries)] = client
+        return client
+
+def set_client(client):
+    """Return `client` from every get_client() call (None to undo)."""
+    global _override
+    _override = client
+
+def close():
+    """Drop cached clients and close the pool (the next get_client() starts fresh)."""
+    global _http
+    with _lock:
+        _clients.clear()
+        if _http is not None:
+            _http.close()
+            _http = None
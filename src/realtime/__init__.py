@@ -0,0 +1,9 @@
+"""Desktop client for the OpenAI Realtime API (run with `python -m src.realtime`)."""
+
+from .audio import AudioPlayer, ByteRing, MicStream
+from .client import RealtimeSession, build_parser, main
+from .metrics import TurnTrace
+from ..resample import Resampler
+from .transport import ConnectionLost, WebSocketTransport
+from .turns import PushToTalk, VADTurns
+from .vad import EnergyVAD
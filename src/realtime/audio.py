@@ -0,0 +1,223 @@
+"""Audio I/O for the realtime client: gapless ring-buffered playback and a callback mic.
+
+Both directions open the device at its native rate and resample to/from the
+API rate (--sr), so a device that can't do 24 kHz no longer fails the session.
+"""
+
+import asyncio, time
+from ..resample import Resampler
+
+
+def _sd():
+    # imported lazily so the offline harness runs without PortAudio installed
+    import sounddevice as sd
+    return sd
+
+def native_rate(device, kind: str) -> int:
+    """Default sample rate of an 'input' or 'output' device (None = system default)."""
+    return int(_sd().query_devices(device, kind)["default_samplerate"])
+
+
+class ByteRing:
+    """Preallocated single-producer/single-consumer byte ring.
+
+    The producer only advances `_w`, the consumer only advances `_r`; both are
+    monotonically growing ints, so neither side needs a lock. clear() only
+    publishes a flush mark that the consumer applies on its next read.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self._mv = memoryview(self._data)
+        self._w = 0          # total bytes written
+        self._r = 0          # total bytes read
+        self._flush_at = 0   # reader skips up to here (barge-in)
+        self.overruns = 0
+        self.overrun_bytes = 0
+        self.underruns = 0
+        self.underrun_bytes = 0
+
+    def available(self) -> int:
+        return self._w - max(self._r, self._flush_at)
+
+    def write(self, data) -> int:
+        """Copy as much of data as fits; the rest is dropped and counted as overrun."""
+        src = memoryview(data)
+        free = self.capacity - (self._w - self._r)
+        n = min(len(src), free)
+        if n < len(src):
+            self.overruns += 1
+            self.overrun_bytes += len(src) - n
+        pos = self._w % self.capacity
+        first = min(n, self.capacity - pos)
+        self._mv[pos:pos + first] = src[:first]
+        if n > first:
+            self._mv[:n - first] = src[first:n]
+        self._w += n
+        return n
+
+    def readinto(self, out) -> int:
+        """Fill `out` (writable buffer); pads with silence and counts an underrun if short."""
+        dst = memoryview(out).cast("B")
+        want = len(dst)
+        r = max(self._r, self._flush_at)
+        n = min(want, self._w - r)
+        pos = r % self.capacity
+        first = min(n, self.capacity - pos)
+        dst[:first] = self._mv[pos:pos + first]
+        if n > first:
+            dst[first:n] = self._mv[:n - first]
+        self._r = r + n
+        if n < want:
+            dst[n:] = _SILENCE[:want - n]
+            if n:  # ran dry mid-playback (an idle stream is not an underrun)
+                self.underruns += 1
+                self.underrun_bytes += want - n
+        return n
+
+    def clear(self):
+        self._flush_at = self._w
+
+_SILENCE = memoryview(bytes(48000 * 2))  # 1 s of PCM16 at 48 kHz; callback blocks are far smaller
+
+class AudioPlayer:
+    """Streams PCM16 mono through one long-lived output stream fed from a ByteRing.
+
+    Deltas are written as they arrive (resampled to the device rate if it
+    differs) and the PortAudio callback drains the ring one block at a time;
+    clear() drops everything not yet played.
+    `stream_factory` defaults to sd.RawOutputStream and can be swapped for a
+    fake that calls the callback directly. `on_audio(t)`, if set, is called
+    from the callback thread whenever sound starts after silence.
+    """
+    def __init__(self, samplerate: int, block_ms: int = 20, buffer_s: float = 60.0, stream_factory=None,
+                 device=None, device_sr: int | None = None):
+        self.sr = samplerate
+        self.block_ms = block_ms
+        self.buffer_s = buffer_s
+        self.device = device
+        self.device_sr = device_sr   # None: the device's native rate (or sr with a stream_factory)
+        self.blocksize = int(samplerate * block_ms / 1000)
+        self.ring = ByteRing(int(samplerate * buffer_s) * 2)
+        self.stream_factory = stream_factory
+        self.stream = None
+        self._rs = None
+        self.on_audio = None
+        self._idle = True
+
+    def start(self):
+        if self.device_sr is None:
+            self.device_sr = self.sr if self.stream_factory else native_rate(self.device, "output")
+        if self.device_sr != self.sr:
+            self._rs = Resampler(self.sr, self.device_sr, block_frames=self.sr // 5)
+            self.ring = ByteRing(int(self.device_sr * self.buffer_s) * 2)
+            self.blocksize = int(self.device_sr * self.block_ms / 1000)
+            print(f"[player] device at {self.device_sr} Hz, resampling from {self.sr} Hz")
+        factory = self.stream_factory or _sd().RawOutputStream
+        self.stream = factory(
+            samplerate=self.device_sr, channels=1, dtype='int16',
+            blocksize=self.blocksize, callback=self._cb, device=self.device
+        )
+        self.stream.start()
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop(); self.stream.close(); self.stream = None
+        r = self.ring
+        if r.underruns or r.overruns:
+            print(f"[player] underruns={r.underruns} ({r.underrun_bytes} B), "
+                  f"overruns={r.overruns} ({r.overrun_bytes} B)")
+
+    def enqueue(self, pcm_bytes: bytes):
+        self.ring.write(self._rs.process(pcm_bytes) if self._rs else pcm_bytes)
+
+    def clear(self):
+        self.ring.clear()
+        if self._rs:
+            self._rs.reset()
+
+    def is_playing(self) -> bool:
+        return self.ring.available() > 0
+
+    def _cb(self, outdata, frames, time_info, status):
+        n = self.ring.readinto(outdata)
+        if n and self._idle and self.on_audio:
+            self.on_audio(time.monotonic())
+        self._idle = n == 0
+
+
+class MicStream:
+    """Raw callback mic -> bounded asyncio.Queue of PCM16 bytes at `samplerate`.
+
+    PortAudio calls _cb on its own thread, so blocks are handed to the event
+    loop with call_soon_threadsafe; consumers simply await q.get(). The device
+    runs at device_sr (default: its native rate) and blocks are resampled in
+    the callback.
+    """
+    def __init__(self, samplerate: int, chunk_ms: int = 50, device=None, max_queue_ms: int = 2000,
+                 device_sr: int | None = None):
+        self.sr = samplerate
+        self.chunk_ms = chunk_ms
+        self.bytes_per_chunk = int(self.sr * (chunk_ms/1000.0)) * 2  # 16-bit mono
+        self.device = device
+        self.device_sr = device_sr
+        self._rs = None
+        self.q: asyncio.Queue[bytes] = asyncio.Queue(maxsize=max(1, max_queue_ms // 20))
+        self.dropped = 0   # blocks discarded because the consumer fell behind
+        self.stream = None
+        self._loop = None
+
+    def _cb(self, indata, frames, time_info, status):
+        if status:
+            # print(status)  # uncomment for troubleshooting
+            pass
+        block = self._rs.process(indata) if self._rs else bytes(indata)
+        self._loop.call_soon_threadsafe(self._put, block)
+
+    def _put(self, block: bytes):
+        # runs on the event loop thread
+        if self.q.full():
+            self.q.get_nowait(); self.dropped += 1  # keep the newest audio
+        self.q.put_nowait(block)
+
+    def drain(self) -> bytes:
+        """Return and remove everything queued right now."""
+        out = bytearray()
+        while not self.q.empty():
+            out += self.q.get_nowait()
+        return bytes(out)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self.drain()  # stale blocks from the previous turn
+        sd = _sd()
+        rate = self.device_sr or native_rate(self.device, "input")
+        try:
+            sd.check_input_settings(device=self.device, samplerate=rate, channels=1, dtype='int16')
+        except Exception as e:
+            print(f"[mic] input settings invalid: {e}")
+            print("[mic] tip: run with --input-device <index> (see sd.query_devices())")
+            raise
+
+        if rate == self.sr:
+            self._rs = None
+        elif self._rs is None or self._rs.src_rate != rate:
+            self._rs = Resampler(rate, self.sr, block_frames=int(rate*0.02))
+        else:
+            self._rs.reset()  # history belongs to the previous take
+        try:
+            self.stream = sd.RawInputStream(
+                samplerate=rate, channels=1, dtype='int16',
+                callback=self._cb, blocksize=int(rate*0.02),  # 20ms
+                device=self.device
+            )
+            self.stream.start()
+            via = f", resampled to {self.sr} Hz" if self._rs else ""
+            print(f"[mic] started at {rate} Hz on device={self.device}{via}")
+        except Exception as e:
+            print(f"[mic] failed to start stream: {e}")
+            raise
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop(); self.stream.close(); self.stream = None
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Desktop Realtime Voice for OpenAI Realtime API
+- Callback-based microphone (reliable on macOS)
+- Push-to-talk on Enter, or hands-free turns with --vad (local voice activity detection)
+- Mic audio is uploaded while recording; model audio plays as it streams in
+- Optional barge-in: cancel model speech only if audio is playing
+- Requests BOTH audio and text back
+- Guards against empty/too-short audio commits
+- Per-turn latency trace (p50/p95 on exit, optional --trace JSONL)
+- Reconnects with backoff if the socket drops, replaying the session config
+  and (with --reseed-items) the recent conversation
+
+Transport, audio I/O and turn-taking are passed into RealtimeSession, so the
+offline harness (src.realtime.harness) can swap in a fake server and fake devices.
+"""
+
+import asyncio, os, sys, getpass, argparse, random, time
+from collections import deque
+
+from .audio import AudioPlayer, MicStream
+from .events import b64decode, b64encode, dumps
+from .metrics import TurnTrace
+from .transport import ConnectionLost, WebSocketTransport
+from .turns import PushToTalk, VADTurns
+
+DEFAULT_MODEL = os.getenv("OPENAI_REALTIME_MODEL", "gpt-4o-realtime-preview")
+DEFAULT_VOICE = os.getenv("OPENAI_REALTIME_VOICE", "verse")
+DEFAULT_SR    = int(os.getenv("OPENAI_REALTIME_SR", "24000"))  # the API's pcm16 rate
+REALTIME_URL  = "wss://api.openai.com/v1/realtime?model={model}"
+CANCEL_WAIT_S = 2.0   # how long a new turn waits for a cancelled response's response.done
+
+# both event-name generations of the API
+AUDIO_DELTA = ("response.output_audio.delta", "response.audio.delta", "output_audio.delta")
+AUDIO_DONE  = ("response.output_audio.done", "response.audio.done", "output_audio.done")
+TEXT_DELTA  = ("response.text.delta", "response.output_text.delta")
+TEXT_DONE   = ("response.text.done", "response.output_text.done")
+ASSISTANT_TRANSCRIPT = ("response.audio_transcript.done", "response.output_audio_transcript.done")
+USER_TRANSCRIPT      = ("conversation.item.input_audio_transcription.completed",)
+
+def get_api_key():
+    key = os.getenv("OPENAI_API_KEY")
+    if key:
+        return key
+    return getpass.getpass("Enter OPENAI_API_KEY: ")
+
+async def user_input(prompt: str = ">> ") -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lambda: input(prompt))
+
+def make_turns(args):
+    if args.vad:
+        return VADTurns(args.sr, threshold_db=args.vad_threshold_db, hangover_ms=args.hangover_ms,
+                        echo_db=args.echo_guard_db, echo_start_ms=args.echo_guard_ms)
+    return PushToTalk(args.sr, debounce_ms=args.debounce_ms)
+
+class RealtimeSession:
+    """One conversation: receive loop, mic loop and console control loop.
+
+    `connect` is an async factory for a new transport; with it, a dropped
+    socket is reconnected instead of ending the session.
+    """
+    def __init__(self, args, transport, player, mic, turns, input_fn=user_input, log=print, connect=None):
+        self.args = args
+        self.transport = transport
+        self.connect = connect
+        self.player = player
+        self.mic = mic
+        self.turns = turns
+        self.input_fn = input_fn
+        self.log = log
+
+        self.expecting_audio = False
+        self.awaiting_response = False
+        self.pending = bytearray()      # mic audio not yet sent; flushed every --append-ms
+        self.sent_bytes = 0
+        self.captured_frames = 0        # counted from the audio itself, not per callback
+        self.append_bytes = int(args.sr * args.append_ms / 1000) * 2
+        self.response_done = asyncio.Event()
+        self._record = open(args.record_events, "a", encoding="utf-8") if args.record_events else None
+        self._t_request = time.monotonic()
+        self._t_append = None
+        self.trace = TurnTrace(args.trace)
+        player.on_audio = lambda t: self.trace.mark("first_audio", t)
+        self.handlers = self._handlers()
+        self.history = deque(maxlen=max(1, args.reseed_items))  # (role, text) for re-seeding
+        self.reconnects_ms: list[float] = []
+        self._online = asyncio.Event(); self._online.set()
+
+    # ---- outgoing ----
+    async def send_event(self, event: dict):
+        """Send, waiting out a reconnect; an event that hits a dead socket is dropped."""
+        if event["type"] == "response.create":
+            self._t_request = time.monotonic()
+        await self._online.wait()
+        try:
+            await self.transport.send(event)
+        except ConnectionLost:
+            self._online.clear()  # recv_loop sees the same drop and reconnects
+            self.log(f"[net] dropped {event['type']} (connection lost)")
+
+    def captured_ms(self) -> int:
+        return self.captured_frames * 1000 // self.args.sr
+
+    async def configure(self):
+        session = {
+            "voice": self.args.voice,
+            "input_audio_format":  "pcm16",
+            "output_audio_format": "pcm16",
+            "turn_detection": None,
+            "instructions": self.args.system_prompt,
+        }
+        if self.args.reseed_items:
+            session["input_audio_transcription"] = {"model": "whisper-1"}  # user turns as text, for re-seeding
+        # sent directly: this also runs while reconnecting, before send_event is unblocked
+        await self.transport.send({"type": "session.update", "session": session})
+
+    async def reseed(self):
+        """Replay the last --reseed-items transcripts as conversation items on a fresh connection."""
+        for role, text in list(self.history):
+            part = "input_text" if role == "user" else "text"
+            await self.transport.send({
+                "type": "conversation.item.create",
+                "item": {"type": "message", "role": role, "content": [{"type": part, "text": text}]},
+            })
+
+    async def resume(self, reason) -> bool:
+        """Reconnect with exponential backoff and restore the session; False if that gave up."""
+        self._online.clear()
+        if not self.connect or self.args.reconnect_attempts <= 0:
+            return False
+        self.log(f"[net] connection lost ({reason}); reconnecting...")
+        t0 = time.monotonic()
+        delay = self.args.reconnect_backoff
+        for attempt in range(1, self.args.reconnect_attempts + 1):
+            try:
+                self.transport = await self.connect()
+                await self.configure()
+                if self.args.reseed_items:
+                    await self.reseed()
+                break
+            except Exception as e:
+                self.log(f"[net] attempt {attempt} failed: {e}")
+                if attempt < self.args.reconnect_attempts:
+                    await asyncio.sleep(delay * (1 + 0.2 * random.random()))
+                    delay = min(delay * 2, 8.0)
+        else:
+            print(f"[net] giving up after {self.args.reconnect_attempts} attempts", file=sys.stderr)
+            return False
+        # whatever the old socket held (uploaded audio, an unfinished reply) is gone
+        self.sent_bytes = 0
+        self.expecting_audio = False
+        self.awaiting_response = False
+        self.response_done.set()
+        ms = (time.monotonic() - t0) * 1000
+        self.reconnects_ms.append(ms)
+        self.log(f"[net] reconnected in {ms:.0f} ms (attempt {attempt}, {len(self.history)} items re-seeded)"
+                 if self.args.reseed_items else f"[net] reconnected in {ms:.0f} ms (attempt {attempt})")
+        self._online.set()
+        return True
+
+    async def begin_turn(self, clear_server: bool = True):
+        self.pending = bytearray(); self.sent_bytes = 0; self.captured_frames = 0
+        self._t_append = None
+        if clear_server:
+            await self.send_event({"type": "input_audio_buffer.clear"})
+
+    async def flush_pending(self):
+        if not self.pending:
+            return
+        chunk, self.pending = self.pending, bytearray()
+        self.sent_bytes += len(chunk)
+        await self.send_event({
+            "type": "input_audio_buffer.append",
+            "audio": b64encode(chunk)
+        })
+        self._t_append = time.monotonic()
+
+    async def push_audio(self, chunk: bytes):
+        self.pending += chunk
+        self.captured_frames += len(chunk) // 2
+        # upload while the user is still talking so only the commit remains at the end of the turn
+        if len(self.pending) >= self.append_bytes:
+            await self.flush_pending()
+
+    async def discard_turn(self):
+        self.pending = bytearray()
+        await self.send_event({"type": "input_audio_buffer.clear"})  # drop partial appends
+        self.sent_bytes = 0; self.captured_frames = 0
+
+    async def end_turn(self, speech_ms: float, speech_end: float | None = None):
+        """Commit what was uploaded and ask for a reply, or drop it if it held too little speech.
+
+        speech_end is the monotonic time the user stopped talking, if earlier than now.
+        """
+        if speech_ms < self.args.min_speech_ms:
+            self.log(f"[rec] too little speech ({speech_ms:.0f} ms of {self.captured_ms()} ms), discarded.")
+            await self.discard_turn()
+            return
+        self.trace.begin(speech_end)
+        # 1) send the tail; everything else went out while recording
+        await self.flush_pending()
+        if self._t_append is not None:
+            self.trace.mark("append_sent", self._t_append)
+        # 2) commit
+        await self.send_event({"type": "input_audio_buffer.commit"})
+        self.trace.mark("commit_sent")
+        self.log(f"[rec] sent {self.captured_ms()} ms ({self.sent_bytes} bytes). Waiting for reply...")
+
+        # 3) create ONE response; a response cancelled by barge-in may still be closing, so let it
+        if self.awaiting_response and self.args.barge_in:
+            try:
+                await asyncio.wait_for(self.response_done.wait(), CANCEL_WAIT_S)
+            except asyncio.TimeoutError:
+                pass
+        if not self.awaiting_response:
+            self.awaiting_response = True
+            self.response_done.clear()
+            await self.send_event({
+                "type": "response.create",
+                "response": {"modalities": ["audio","text"]}
+            })
+        else:
+            self.log("[debug] skipped response.create (already awaiting).")
+        self.sent_bytes = 0; self.captured_frames = 0
+
+    async def cancel_response(self):
+        await self.send_event({"type": "response.cancel"})
+        self.player.clear()
+
+    # ---- incoming: one handler per event type ----
+    def _handlers(self) -> dict:
+        table = {
+            "error": self.on_error,
+            "response.completed": self.on_response_done,
+            "response.done": self.on_response_done,
+            "input_audio_buffer.committed": self.on_committed,
+        }
+        for t in AUDIO_DELTA: table[t] = self.on_audio_delta
+        for t in AUDIO_DONE: table[t] = self.on_ignore
+        for t in TEXT_DELTA: table[t] = self.on_text_delta
+        for t in TEXT_DONE: table[t] = self.on_text_done
+        for t in ASSISTANT_TRANSCRIPT: table[t] = self.on_assistant_transcript
+        for t in USER_TRANSCRIPT: table[t] = self.on_user_transcript
+        return table
+
+    def on_error(self, msg):
+        err = msg.get("error", {})
+        code = err.get("code")
+        if code == "response_cancel_not_active":
+            return
+        print(f"[error] {msg}", file=sys.stderr, flush=True)
+        if code == "input_audio_buffer_commit_empty":
+            self.awaiting_response = False
+
+    def on_audio_delta(self, msg):
+        # support both payload keys
+        self.trace.mark("first_delta")
+        self.expecting_audio = True
+        b64 = msg.get("delta") or msg.get("audio")
+        if b64: self.player.enqueue(b64decode(b64))  # plays while the rest is generated
+
+    def on_text_delta(self, msg):
+        # optional captions
+        self.trace.mark("first_delta")
+        print(msg.get("delta",""), end="", flush=True)
+
+    def on_text_done(self, msg):
+        print()
+        if msg.get("text"):
+            self.history.append(("assistant", msg["text"]))
+
+    def on_assistant_transcript(self, msg):
+        self.log("[transcript]", msg.get("transcript"))
+        if msg.get("transcript"):
+            self.history.append(("assistant", msg["transcript"]))
+
+    def on_user_transcript(self, msg):
+        self.log("[you]", msg.get("transcript"))
+        if msg.get("transcript"):
+            self.history.append(("user", msg["transcript"]))
+
+    def on_response_done(self, msg):
+        self.trace.mark("response_done")
+        self.expecting_audio = False
+        self.awaiting_response = False
+        self.response_done.set()
+
+    def on_committed(self, msg):
+        self.log("[server] input_audio_buffer committed:", msg.get("item_id"))
+
+    def on_ignore(self, msg):
+        pass
+
+    def on_other(self, msg):
+        t = msg.get("type","")
+        if t.endswith("transcript.done"):
+            # assistant transcript or (if enabled) input transcript
+            self.log("[transcript]", msg.get("transcript"))
+        elif t.endswith(".delta"):
+            if t.startswith("response."):
+                self.trace.mark("first_delta")
+            # transcript deltas etc.; too chatty to log
+        else:
+            self.log("[recv]", t, msg.get("id") or msg.get("event_id") or "")
+
+    # ---- loops ----
+    async def recv_loop(self):
+        handlers, other = self.handlers, self.on_other
+        while True:
+            try:
+                msg = await self.transport.recv()
+            except ConnectionLost as e:
+                if await self.resume(e):
+                    continue
+                raise
+            if msg is None:
+                continue
+            if self._record:
+                # replayable by FakeRealtimeServer: dt is relative to our last response.create
+                self._record.write(dumps({"dt": round(time.monotonic() - self._t_request, 4), "event": msg}) + "\n")
+            handlers.get(msg.get("type"), other)(msg)
+
+    async def mic_loop(self):
+        while True:
+            chunk = await self.mic.q.get()  # idle (no CPU) while the mic is stopped
+            await self.turns.on_block(self, chunk)
+
+    async def control_loop(self):
+        await self.turns.start(self)
+        while True:
+            cmd = (await self.input_fn()).strip()
+            if cmd == "":
+                await self.turns.on_enter(self)
+            elif cmd == "/s":
+                if self.expecting_audio:
+                    await self.cancel_response()
+                    self.log("[barge-in] canceled model speech.")
+                else:
+                    self.log("[barge-in] nothing to cancel.")
+            elif cmd == "/q":
+                self.log("Exiting...")
+                break
+            else:
+                self.log("Unknown command. Use Enter, /s, or /q.")
+
+    async def run(self):
+        await self.configure()
+        self.player.start()
+        tasks = [
+            asyncio.create_task(self.recv_loop()),
+            asyncio.create_task(self.mic_loop()),
+            asyncio.create_task(self.control_loop()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for t in tasks:
+                t.cancel()
+            self.mic.stop()
+            self.player.stop()
+            if self._record:
+                self._record.close()
+            self.trace.close()
+            self.log(self.trace.summary())
+        for t in done:
+            if not t.cancelled() and t.exception():
+                raise t.exception()
+
+async def realtime_session(args):
+    api_key = get_api_key()
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "OpenAI-Beta": "realtime=v1",
+    }
+
+    def connect():
+        return WebSocketTransport.connect(REALTIME_URL.format(model=args.model), headers)
+
+    transport = await connect()
+    player = AudioPlayer(args.sr, device=args.output_device, device_sr=args.output_sr)
+    mic = MicStream(args.sr, chunk_ms=args.chunk_ms, device=args.input_device, device_sr=args.input_sr)
+    turns = make_turns(args)
+    print(f"Connected. Model={args.model}, Voice={args.voice}, SR={args.sr}\n")
+    if turns.hands_free and args.barge_in:
+        print("[vad] barge-in is on: use headphones, or the model's voice from the speakers may "
+              "interrupt its own reply (see --echo-guard-db).\n")
+    if turns.hands_free:
+        print("Controls:\n  (just talk: turns end after a pause)\n  Enter = mute/unmute mic\n  /s = stop current model speech (barge-in)\n  /q = quit\n")
+    else:
+        print("Controls:\n  Enter = start/stop talking (push-to-talk)\n  /s = stop current model speech (barge-in)\n  /q = quit\n")
+    session = RealtimeSession(args, transport, player, mic, turns, connect=connect)
+    try:
+        await session.run()
+    finally:
+        await session.transport.close()
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Desktop Realtime Voice (push-to-talk or hands-free)")
+    p.add_argument("--model", default=DEFAULT_MODEL, help="Realtime model name")
+    p.add_argument("--voice", default=DEFAULT_VOICE, help="Realtime voice (e.g., verse, alloy)")
+    p.add_argument("--sr", type=int, default=DEFAULT_SR, help="API audio sample rate (Hz); devices are resampled to it")
+    p.add_argument("--chunk-ms", type=int, default=50, help="Mic chunk size (ms)")
+    p.add_argument("--barge-in", action="store_true", help="Allow Enter/speech to cancel model speech and start recording")
+    p.add_argument("--system-prompt", default="Be concise and helpful.", help="System instructions")
+    p.add_argument("--input-device", type=int, default=None, help="Input device index (see sd.query_devices())")
+    p.add_argument("--output-device", type=int, default=None, help="Output device index (see sd.query_devices())")
+    p.add_argument("--input-sr", type=int, default=None, help="Force the mic's sample rate (default: device native)")
+    p.add_argument("--output-sr", type=int, default=None, help="Force the speaker's sample rate (default: device native)")
+    p.add_argument("--min-speech-ms", "--min-ms", dest="min_speech_ms", type=int, default=200,
+                   help="Minimum voiced duration for a turn to be sent (ms)")
+    p.add_argument("--append-ms", type=int, default=100, help="Upload mic audio in chunks of this size while recording (ms)")
+    p.add_argument("--debounce-ms", type=int, default=200, help="Push-to-talk: ignore repeated Enter within this window (ms)")
+    p.add_argument("--vad", action="store_true", help="Hands-free: detect end of speech locally and auto-commit")
+    p.add_argument("--hangover-ms", type=int, default=600, help="VAD: silence after speech that ends a turn (ms)")
+    p.add_argument("--vad-threshold-db", type=float, default=12.0, help="VAD: level above the noise floor counted as speech (dB)")
+    p.add_argument("--echo-guard-db", type=float, default=10.0,
+                   help="VAD + barge-in: extra level needed to start a turn while the reply is playing (dB)")
+    p.add_argument("--echo-guard-ms", type=int, default=300,
+                   help="VAD + barge-in: speech needed to start a turn while the reply is playing (ms)")
+    p.add_argument("--record-events", default=None, help="Append received server events to this JSONL (replayable by the fake server)")
+    p.add_argument("--reconnect-attempts", type=int, default=5, help="Reconnect tries after the socket drops (0 = exit instead)")
+    p.add_argument("--reconnect-backoff", type=float, default=0.25, help="First reconnect delay (s); doubles per attempt up to 8 s")
+    p.add_argument("--reseed-items", type=int, default=0,
+                   help="After a reconnect, replay this many recent transcripts as conversation items (enables input transcription)")
+    p.add_argument("--trace", default=None, help="Append one JSONL record of latency marks per turn to this file")
+    return p
+
+def main():
+    args = build_parser().parse_args()
+    try:
+        asyncio.run(realtime_session(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""JSON and base64 helpers for Realtime events.
+
+Audio deltas arrive many times a second and are mostly base64 text, so the
+per-event cost is parsing plus decoding. orjson is used when installed
+(pip install orjson), otherwise the stdlib json module; base64 goes through
+binascii directly, skipping base64.b64decode's extra validation/copies.
+"""
+
+import binascii, json
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson else "json"
+
+if orjson:
+    loads = orjson.loads   # accepts str and bytes
+
+    def dumps(event: dict) -> str:
+        return orjson.dumps(event).decode()  # text frame, not binary
+else:
+    loads = json.loads
+
+    def dumps(event: dict) -> str:
+        return json.dumps(event, separators=(",", ":"))
+
+
+def b64decode(s) -> bytes:
+    return binascii.a2b_base64(s)
+
+
+def b64encode(data) -> str:
+    return binascii.b2a_base64(data, newline=False).decode("ascii")
@@ -0,0 +1,143 @@
+"""Local stand-in for the Realtime API websocket, for offline latency measurements.
+
+Responses come from a recorded event stream: a JSONL file written with
+`--record-events`, one {"dt": seconds_after_response_create, "event": {...}}
+per line. The stream is split into turns at each response.done, and every
+response.create from the client replays the next turn with its original
+timing (scaled by `speed`). FakeRealtimeServer.synthetic() builds such turns
+without a recording. drop() cuts every open connection, to exercise the
+client's reconnect path.
+"""
+
+import asyncio, base64, json, math
+import websockets
+
+END_EVENTS = ("response.done", "response.completed")
+
+
+class FakeRealtimeServer:
+    def __init__(self, turns: list[list[tuple[float, dict]]], host: str = "127.0.0.1", port: int = 0, speed: float = 1.0):
+        if not turns:
+            raise ValueError("need at least one recorded turn to replay")
+        self.turns = turns
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.received: list[dict] = []   # every client event, for assertions
+        self.connections = 0             # accepted so far, including reconnects
+        self._server = None
+        self._conns = set()
+
+    @classmethod
+    def from_jsonl(cls, path: str, **kw):
+        turns, cur = [], []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                ev = rec["event"]
+                if ev.get("type", "").startswith(("session.", "input_audio_buffer.")):
+                    continue  # the server answers these itself
+                cur.append((float(rec["dt"]), ev))
+                if ev.get("type") in END_EVENTS:
+                    turns.append(cur); cur = []
+        if cur:
+            turns.append(cur)
+        return cls(turns, **kw)
+
+    @classmethod
+    def synthetic(cls, n_turns: int = 3, first_delta_ms: float = 400, n_deltas: int = 20, delta_ms: float = 40,
+                  sr: int = 24000, **kw):
+        """Turns of n_deltas audio deltas (a quiet tone, delta_ms of audio each) arriving every delta_ms."""
+        samples = int(sr * delta_ms / 1000)
+        tone = bytearray()
+        for i in range(samples):
+            v = int(3000 * math.sin(2 * math.pi * 220 * i / sr))
+            tone += v.to_bytes(2, "little", signed=True)
+        b64 = base64.b64encode(bytes(tone)).decode("ascii")
+        turns = []
+        for k in range(n_turns):
+            t0 = first_delta_ms / 1000
+            evs = [(t0 * 0.5, {"type": "response.created", "response": {"id": f"resp_{k}"}})]
+            evs += [(t0 + i * delta_ms / 1000, {"type": "response.audio.delta", "delta": b64}) for i in range(n_deltas)]
+            t_end = t0 + n_deltas * delta_ms / 1000
+            evs += [(t_end, {"type": "response.audio.done"}),
+                    (t_end, {"type": "response.audio_transcript.done", "transcript": f"Réponse numéro {k + 1}."}),
+                    (t_end, {"type": "response.done", "response": {"id": f"resp_{k}", "status": "completed"}})]
+            turns.append(evs)
+        return cls(turns, **kw)
+
+    # ---- lifecycle ----
+    async def start(self) -> str:
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return f"ws://{self.host}:{self.port}"
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def drop(self, abrupt: bool = True):
+        """Cut all open connections: abrupt aborts TCP (like a network loss), else a 1012 close."""
+        for ws in list(self._conns):
+            if abrupt:
+                ws.transport.abort()
+            else:
+                await ws.close(code=1012, reason="service restart")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # ---- protocol ----
+    async def _handler(self, ws, *_):  # websockets<14 also passes the request path
+        self._conns.add(ws)
+        self.connections += 1
+        turn_idx, replay, transcribe = 0, None, False
+        try:
+            async for raw in ws:
+                ev = json.loads(raw)
+                self.received.append(ev)
+                t = ev.get("type")
+                if t == "session.update":
+                    transcribe = bool(ev.get("session", {}).get("input_audio_transcription"))
+                    await ws.send(json.dumps({"type": "session.updated", "session": ev.get("session", {})}))
+                elif t == "input_audio_buffer.commit":
+                    await ws.send(json.dumps({"type": "input_audio_buffer.committed", "item_id": f"item_{turn_idx}"}))
+                    if transcribe:
+                        await ws.send(json.dumps({"type": "conversation.item.input_audio_transcription.completed",
+                                                  "item_id": f"item_{turn_idx}", "transcript": f"Question {turn_idx + 1}"}))
+                elif t == "conversation.item.create":
+                    await ws.send(json.dumps({"type": "conversation.item.created", "item": ev.get("item", {})}))
+                elif t == "input_audio_buffer.clear":
+                    await ws.send(json.dumps({"type": "input_audio_buffer.cleared"}))
+                elif t == "response.create":
+                    replay = asyncio.create_task(self._replay(ws, self.turns[turn_idx % len(self.turns)]))
+                    turn_idx += 1
+                elif t == "response.cancel":
+                    if replay and not replay.done():
+                        replay.cancel()
+                        await ws.send(json.dumps({"type": "response.done", "response": {"status": "cancelled"}}))
+                    else:
+                        await ws.send(json.dumps({"type": "error", "error": {"code": "response_cancel_not_active"}}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if replay:
+                replay.cancel()
+            self._conns.discard(ws)
+
+    async def _replay(self, ws, events: list[tuple[float, dict]]):
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        for dt, ev in events:
+            delay = t0 + dt / self.speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await ws.send(json.dumps(ev))
@@ -0,0 +1,256 @@
+"""Offline, network-free harness for the realtime client.
+
+Runs the real RealtimeSession (transport, ByteRing playback, turn-taking)
+against FakeRealtimeServer on localhost, with a scripted fake mic and a fake
+output stream that clocks the playback callback in real time. Reports, per
+turn, the time from the end of the user's turn to the first audible output
+and to response.done.
+
+    python -m src.realtime.harness --turns 5
+    python -m src.realtime.harness --replay session.jsonl   # from --record-events
+    python -m src.realtime.harness --drop-turn 1 -- --reseed-items 10   # cut the socket mid-reply
+    python -m src.realtime.harness --bench-decode 5000      # event decoding micro-benchmark
+"""
+
+import asyncio, argparse, base64, contextlib, io, json, math, random, threading, time
+
+from .audio import AudioPlayer
+from .client import RealtimeSession, build_parser, make_turns
+from .events import JSON_BACKEND, loads
+from .fake_server import FakeRealtimeServer
+from .metrics import _pct
+from .transport import WebSocketTransport
+
+
+class FakeOutputStream:
+    """Drop-in for sd.RawOutputStream: a thread calls the callback once per block period."""
+    def __init__(self, samplerate, channels, dtype, blocksize, callback, **_):
+        self.period = blocksize / samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.onsets: list[float] = []   # monotonic times where sound started after silence
+        self._buf = bytearray(blocksize * 2)
+        self._stop = threading.Event()
+        self._thr = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thr.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thr.join(timeout=1.0)
+
+    def close(self):
+        pass
+
+    def _run(self):
+        silent = True
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            self.callback(self._buf, self.blocksize, None, None)
+            audible = any(self._buf)
+            if audible and silent:
+                self.onsets.append(time.monotonic())
+            silent = not audible
+            next_t += self.period
+            time.sleep(max(0.0, next_t - time.monotonic()))
+
+
+class FakeMic:
+    """Drop-in for MicStream: 20 ms blocks of quiet noise; each cue() speaks a tone for speech_ms after lead_ms."""
+    def __init__(self, samplerate: int, speech_ms: int = 1200, lead_ms: int = 300, seed: int = 0):
+        self.sr = samplerate
+        self.speech_ms = speech_ms
+        self.lead_ms = lead_ms
+        self.q: asyncio.Queue[bytes] = asyncio.Queue()
+        self.dropped = 0
+        self._task = None
+        self._cued = False
+        self._cue_block = None
+        self._rng = random.Random(seed)
+
+    def cue(self):
+        self._cued = True  # picked up by the feeder on its next block
+
+    def _block(self, i: int, voiced: bool) -> bytes:
+        n = self.sr // 50
+        out = bytearray()
+        for k in range(n):
+            v = self._rng.gauss(0, 40)
+            if voiced:
+                v += 4000 * math.sin(2 * math.pi * 180 * (i * n + k) / self.sr)
+            out += int(max(-32768, min(32767, v))).to_bytes(2, "little", signed=True)
+        return bytes(out)
+
+    async def _feed(self):
+        i, t0 = 0, time.monotonic()
+        while True:
+            if self._cued:
+                self._cued, self._cue_block = False, i
+            ms = (i - self._cue_block) * 20 if self._cue_block is not None else -1
+            self.q.put_nowait(self._block(i, voiced=self.lead_ms <= ms < self.lead_ms + self.speech_ms))
+            i += 1
+            await asyncio.sleep(max(0.0, t0 + i * 0.02 - time.monotonic()))
+
+    def drain(self) -> bytes:
+        out = bytearray()
+        while not self.q.empty():
+            out += self.q.get_nowait()
+        return bytes(out)
+
+    def start(self):
+        self.drain()
+        self._task = asyncio.get_running_loop().create_task(self._feed())
+        self.cue()
+
+    def stop(self):
+        if self._task:
+            self._task.cancel(); self._task = None
+
+
+async def run_offline(turns: int = 3, speech_ms: int = 1200, replay: str | None = None, speed: float = 1.0,
+                      client_args: list[str] | None = None, verbose: bool = False,
+                      drop_turn: int | None = None) -> list[dict]:
+    args = build_parser().parse_args(client_args or [])
+    server = (FakeRealtimeServer.from_jsonl(replay, speed=speed) if replay
+              else FakeRealtimeServer.synthetic(n_turns=turns, sr=args.sr, speed=speed))
+    results = []
+    async with server:
+        def connect():
+            return WebSocketTransport.connect(f"ws://{server.host}:{server.port}")
+
+        transport = await connect()
+        streams = []
+        player = AudioPlayer(args.sr, device_sr=args.output_sr, stream_factory=lambda **kw: streams.append(FakeOutputStream(**kw)) or streams[-1])
+        mic = FakeMic(args.sr, speech_ms)
+        commands: asyncio.Queue[str] = asyncio.Queue()
+        log = print if verbose else (lambda *a, **k: None)
+        session = RealtimeSession(args, transport, player, mic, make_turns(args), input_fn=commands.get, log=log,
+                                  connect=connect)
+        with contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO()):
+            runner = asyncio.create_task(session.run())
+            for k in range(turns):
+                if session.turns.hands_free:
+                    mic.cue()
+                else:
+                    await commands.put("")
+                await asyncio.sleep((mic.lead_ms + speech_ms) / 1000)
+                if not session.turns.hands_free:
+                    await commands.put("")
+                t_end = time.monotonic()
+                if k == drop_turn:
+                    await asyncio.sleep(0.6 / speed)  # the reply is streaming by now
+                    await server.drop()
+                # wait for this turn's response.create, then for its response.done
+                while session.response_done.is_set() and time.monotonic() - t_end < 5:
+                    await asyncio.sleep(0.005)
+                await asyncio.wait_for(session.response_done.wait(), timeout=30)
+                t_done = time.monotonic()
+                await asyncio.sleep(0.1)  # let the first blocks reach the fake speaker
+                onset = next((t for t in streams[0].onsets if t >= t_end), None)
+                results.append({
+                    "turn": k,
+                    "dropped": k == drop_turn,
+                    "first_audio_ms": (onset - t_end) * 1000 if onset else None,
+                    "done_ms": (t_done - t_end) * 1000,
+                })
+                while player.is_playing():
+                    await asyncio.sleep(0.02)
+            await commands.put("/q")
+            await runner
+        for r, tr in zip(results, session.trace.turns):  # the client's own breakdown of the same turns
+            r.update({k: tr[k] for k in ("endpoint_ms", "upload_ms", "model_ms", "playback_ms")})
+        await session.transport.close()
+        if session.reconnects_ms:
+            results.append({"reconnects_ms": session.reconnects_ms, "connections": server.connections,
+                            "reseeded": sum(e["type"] == "conversation.item.create" for e in server.received)})
+    return results
+
+
+def _legacy_decode(raws: list[str]) -> bytes:
+    """The pre-dispatch path: stdlib json, base64.b64decode, an if-chain and a final join."""
+    chunks = []
+    for raw in raws:
+        msg = json.loads(raw)
+        t = msg.get("type", "")
+        if t == "error":
+            continue
+        if t in ("response.output_audio.delta", "response.audio.delta", "output_audio.delta"):
+            b64 = msg.get("delta") or msg.get("audio")
+            if b64: chunks.append(base64.b64decode(b64))
+            continue
+        if t in ("response.output_audio.done", "response.audio.done", "output_audio.done"):
+            continue
+        if t in ("response.text.delta", "response.output_text.delta"):
+            continue
+        if t in ("response.completed", "response.done"):
+            continue
+        if t.endswith(".delta"):
+            continue
+    return b"".join(chunks)
+
+
+def bench_decode(n: int = 5000, delta_ms: int = 40, sr: int = 24000, rounds: int = 5) -> dict:
+    """Per-event decode cost (us) for a stream of audio + transcript deltas: legacy path vs session handlers."""
+    pcm = bytes(random.Random(0).randbytes(int(sr * delta_ms / 1000) * 2))
+    audio = json.dumps({"type": "response.audio.delta", "response_id": "resp_0", "item_id": "item_0",
+                        "output_index": 0, "content_index": 0, "delta": base64.b64encode(pcm).decode()})
+    text = json.dumps({"type": "response.audio_transcript.delta", "response_id": "resp_0", "delta": "Bonjour "})
+    raws = [audio if i % 2 == 0 else text for i in range(n)]
+
+    args = build_parser().parse_args([])
+    player = AudioPlayer(sr)   # never started: the benchmark drains the ring like the callback would
+    session = RealtimeSession(args, None, player, None, None, log=lambda *a, **k: None)
+    out = bytearray(len(pcm))
+
+    def current():
+        handlers, other = session.handlers, session.on_other
+        for raw in raws:
+            msg = loads(raw)
+            handlers.get(msg.get("type"), other)(msg)
+            player.ring.readinto(out)
+
+    best = {}
+    for name, fn in (("legacy", lambda: _legacy_decode(raws)), ("current", current)):
+        times = []
+        for _ in range(rounds):
+            t0 = time.perf_counter(); fn(); times.append(time.perf_counter() - t0)
+        best[name] = min(times) / n * 1e6
+    session.trace.close()
+    return best
+
+
+def main():
+    p = argparse.ArgumentParser(description="Offline latency harness for the realtime client")
+    p.add_argument("--turns", type=int, default=3)
+    p.add_argument("--speech-ms", type=int, default=1200, help="Fake utterance length per turn")
+    p.add_argument("--replay", default=None, help="JSONL recorded with --record-events (default: synthetic turns)")
+    p.add_argument("--speed", type=float, default=1.0, help="Replay speed factor")
+    p.add_argument("--verbose", action="store_true")
+    p.add_argument("--drop-turn", type=int, default=None, help="Cut the connection during this turn's reply")
+    p.add_argument("--bench-decode", type=int, default=0, metavar="N",
+                   help="Only run the event decoding micro-benchmark over N events")
+    p.add_argument("client_args", nargs=argparse.REMAINDER, help="Extra client flags after --, e.g. -- --vad")
+    a = p.parse_args()
+    if a.bench_decode:
+        res = bench_decode(a.bench_decode)
+        print(f"decode per event ({JSON_BACKEND}): legacy {res['legacy']:.1f} us, "
+              f"current {res['current']:.1f} us ({res['legacy'] / res['current']:.1f}x)")
+        return
+    extra = [x for x in a.client_args if x != "--"]
+    res = asyncio.run(run_offline(a.turns, a.speech_ms, a.replay, a.speed, extra, a.verbose, a.drop_turn))
+    if res and "reconnects_ms" in res[-1]:
+        rc = res.pop()
+        print(f"reconnects: {', '.join(f'{ms:.0f} ms' for ms in rc['reconnects_ms'])} "
+              f"({rc['connections']} connections, {rc['reseeded']} items re-seeded)")
+    for r in res:
+        fa = f"{r['first_audio_ms']:.0f}" if r["first_audio_ms"] is not None else "-"
+        parts = ", ".join(f"{k[:-3]} {r[k]:.0f}" for k in ("endpoint_ms", "upload_ms", "model_ms", "playback_ms") if r.get(k) is not None)
+        print(f"turn {r['turn']}{' (dropped)' if r['dropped'] else ''}: first audio {fa} ms, response.done {r['done_ms']:.0f} ms ({parts})")
+    fa = [r["first_audio_ms"] for r in res if r["first_audio_ms"] is not None]
+    print(f"first audio p50 {_pct(fa, .5):.0f} ms / p95 {_pct(fa, .95):.0f} ms; "
+          f"done p50 {_pct([r['done_ms'] for r in res], .5):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Per-turn latency trace for the realtime client.
+
+Each committed turn gets monotonic timestamps for the points where latency
+can hide: end of speech, last append sent, commit sent, first response.*delta
+received, first audio reaching the speaker and response.done. A turn is
+closed when the next one starts (first audio may come after response.done),
+written to the optional JSONL trace, and summarised as p50/p95 on exit.
+"""
+
+import json, threading, time
+from datetime import datetime, timezone
+
+MARKS = ("speech_end", "turn_end", "append_sent", "commit_sent", "first_delta", "first_audio", "response_done")
+
+# (label, from, to): where the time between end of speech and sound goes
+SEGMENTS = (
+    ("endpoint", "speech_end",  "turn_end"),     # VAD hangover; 0 for push-to-talk
+    ("upload",   "turn_end",    "commit_sent"),
+    ("model",    "commit_sent", "first_delta"),
+    ("playback", "first_delta", "first_audio"),
+    ("total",    "speech_end",  "first_audio"),
+    ("done",     "commit_sent", "response_done"),
+)
+
+
+def _pct(vals: list[float], q: float) -> float:
+    vals = sorted(vals)
+    return vals[min(len(vals) - 1, int(round(q * (len(vals) - 1))))] if vals else float("nan")
+
+
+class TurnTrace:
+    """Collects marks for the current turn; mark() may be called from the audio callback thread."""
+    def __init__(self, path: str | None = None):
+        self.turns: list[dict] = []
+        self._cur: dict | None = None
+        self._n = 0
+        self._lock = threading.Lock()
+        self._out = open(path, "a", encoding="utf-8") if path else None
+
+    def begin(self, speech_end: float | None = None):
+        """Start a turn at the moment it is closed locally; speech_end may lie earlier (VAD hangover)."""
+        now = time.monotonic()
+        with self._lock:
+            self._close()
+            self._cur = {"speech_end": speech_end if speech_end is not None else now, "turn_end": now}
+
+    def mark(self, name: str, t: float | None = None):
+        """Record the first occurrence of `name` in the current turn; later ones are ignored."""
+        cur = self._cur
+        if cur is not None and name not in cur:
+            cur[name] = t if t is not None else time.monotonic()
+
+    def _close(self):
+        cur, self._cur = self._cur, None
+        if not cur:
+            return
+        t0 = cur["speech_end"]
+        rec = {"turn": self._n,
+               "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+               "marks_ms": {k: round((cur[k] - t0) * 1000, 1) for k in MARKS if k in cur}}
+        for label, a, b in SEGMENTS:
+            rec[f"{label}_ms"] = round((cur[b] - cur[a]) * 1000, 1) if a in cur and b in cur else None
+        self._n += 1
+        self.turns.append(rec)
+        if self._out:
+            self._out.write(json.dumps(rec) + "\n"); self._out.flush()
+
+    def close(self):
+        with self._lock:
+            self._close()
+        if self._out:
+            self._out.close(); self._out = None
+
+    def summary(self) -> str:
+        if not self.turns:
+            return "[latency] no completed turns"
+        lines = [f"[latency] {len(self.turns)} turn(s), ms"]
+        for label, a, b in SEGMENTS:
+            vals = [t[f"{label}_ms"] for t in self.turns if t[f"{label}_ms"] is not None]
+            if vals:
+                lines.append(f"  {label:<9} {a} -> {b}: p50 {_pct(vals, .5):.0f}  p95 {_pct(vals, .95):.0f}  (n={len(vals)})")
+        return "\n".join(lines)
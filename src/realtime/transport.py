@@ -0,0 +1,48 @@
+"""Event transport for the realtime client: JSON events over a websocket."""
+
+import asyncio, inspect
+import websockets
+
+from .events import dumps, loads
+
+
+class ConnectionLost(Exception):
+    """The socket closed under us; the session may reconnect and resume."""
+
+
+class WebSocketTransport:
+    """Sends/receives Realtime events as dicts; sends are serialized so appends stay ordered before a commit."""
+    def __init__(self, ws):
+        self.ws = ws
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, url: str, headers: dict | None = None, ping_interval: float | None = 20):
+        connect_kwargs = {"ping_interval": ping_interval}
+        if headers:
+            # websockets changed the connect() signature in v15, so support both.
+            params = inspect.signature(websockets.connect).parameters
+            header_arg = "additional_headers" if "additional_headers" in params else "extra_headers"
+            connect_kwargs[header_arg] = headers
+        return cls(await websockets.connect(url, **connect_kwargs))
+
+    async def send(self, event: dict):
+        data = dumps(event)
+        async with self._lock:
+            try:
+                await self.ws.send(data)
+            except websockets.ConnectionClosed as e:
+                raise ConnectionLost(str(e)) from e
+
+    async def recv(self) -> dict | None:
+        """Next event, or None for frames that are not JSON text."""
+        try:
+            raw = await self.ws.recv()
+        except websockets.ConnectionClosed as e:
+            raise ConnectionLost(str(e)) from e
+        if isinstance(raw, (bytes, bytearray)):
+            return None
+        return loads(raw)
+
+    async def close(self):
+        await self.ws.close()
@@ -0,0 +1,122 @@
+"""Turn-taking strategies: decide when mic audio is uploaded and when a turn is committed.
+
+A strategy gets every mic block (on_block) and every console command that is
+an empty line (on_enter); it drives the session through push_audio(),
+end_turn(), discard_turn() and cancel_response().
+"""
+
+import asyncio, time
+from .vad import EnergyVAD
+
+
+class PushToTalk:
+    """Enter starts recording, the next Enter commits it."""
+    hands_free = False
+
+    def __init__(self, samplerate: int, debounce_ms: int = 200):
+        self.sr = samplerate
+        self.debounce_s = debounce_ms / 1000
+        self.recording = False
+        self.voiced_frames = 0
+        self._last_enter = 0.0
+        self._vad = EnergyVAD(samplerate)  # only measures how much of the take is speech
+
+    async def start(self, s):
+        pass
+
+    async def on_enter(self, s):
+        now = time.monotonic()
+        if now - self._last_enter < self.debounce_s:
+            s.log("[debug] ignored duplicate Enter (debounce)")
+            return
+        self._last_enter = now
+
+        if not self.recording:
+            if s.awaiting_response and not s.args.barge_in:
+                s.log("[debug] response in progress; wait for completion.")
+                return
+            if s.args.barge_in and s.awaiting_response:
+                await s.cancel_response()
+            await s.begin_turn()
+            try:
+                s.mic.start()
+            except Exception:
+                # don’t flip into “recording” state if start failed
+                return
+            self.recording = True
+            self.voiced_frames = 0
+            s.log("[rec] ... speak ... (press Enter to send)")
+            return
+
+        # Stop, commit, request response
+        s.mic.stop()
+        await asyncio.sleep(0)  # let already-scheduled mic callbacks land
+        self.recording = False
+        tail = s.mic.drain()  # blocks captured before the stream stopped
+        if tail:
+            await self._take(s, tail)
+        s.log(f"[rec] stopping; captured ~{s.captured_ms()} ms")
+        await s.end_turn(self.voiced_frames * 1000 / self.sr)
+
+    async def on_block(self, s, chunk: bytes):
+        if self.recording:
+            await self._take(s, chunk)
+
+    async def _take(self, s, chunk: bytes):
+        if self._vad.is_voiced(chunk):
+            self.voiced_frames += len(chunk) // 2
+        await s.push_audio(chunk)
+
+
+class VADTurns:
+    """Hands-free: the mic stays open and a pause of hangover_ms ends the turn; Enter mutes.
+
+    With barge-in the mic also hears the model's own voice from the speakers. While
+    audio is playing, speech must be echo_db louder and last echo_start_ms before it
+    opens a turn, so the reply doesn't cancel itself; speakers loud enough to beat
+    that still need headphones.
+    """
+    hands_free = True
+
+    def __init__(self, samplerate: int, threshold_db: float = 12.0, hangover_ms: int = 600,
+                 echo_db: float = 10.0, echo_start_ms: int = 300):
+        self.vad = EnergyVAD(samplerate, threshold_db=threshold_db, hangover_ms=hangover_ms)
+        self.muted = False
+        self.threshold_db, self.start_ms = threshold_db, self.vad.start_ms
+        self.echo_db, self.echo_start_ms = echo_db, echo_start_ms
+
+    async def start(self, s):
+        s.mic.start()
+
+    async def on_enter(self, s):
+        self.muted = not self.muted
+        if self.muted and self.vad.in_speech:
+            await s.discard_turn()
+        self.vad.reset()
+        s.log("[vad] mic muted" if self.muted else "[vad] listening")
+
+    async def on_block(self, s, chunk: bytes):
+        if self.muted:
+            return
+        if not s.args.barge_in and (s.awaiting_response or s.player.is_playing()):
+            # hold the mic until the reply is done, as push-to-talk does: a turn opened now
+            # would be committed without a response.create, and the model's own voice from
+            # the speakers must not open one either
+            return
+        was_speaking = self.vad.in_speech
+        if not was_speaking:
+            # echo guard: only a clearly louder, longer onset may barge in on playback
+            echo = s.player.is_playing()
+            self.vad.threshold_db = self.threshold_db + (self.echo_db if echo else 0.0)
+            self.vad.start_ms = max(self.start_ms, self.echo_start_ms) if echo else self.start_ms
+        out, ended = self.vad.push(chunk)
+        if self.vad.in_speech and not was_speaking:
+            s.log("[vad] speech")
+            if s.args.barge_in and s.awaiting_response:
+                await s.cancel_response()
+            await s.begin_turn(clear_server=False)  # the buffer is empty after the last commit
+        if out:
+            await s.push_audio(out)
+        if ended:
+            # the turn closes hangover_ms after the user actually stopped
+            await s.end_turn(self.vad.voiced_ms, speech_end=time.monotonic() - self.vad.hangover_ms / 1000)
@@ -0,0 +1,86 @@
+"""Local voice activity detection on PCM16 mono blocks."""
+
+import collections
+import numpy as np
+
+
+class EnergyVAD:
+    """Energy + zero-crossing voice activity detector for PCM16 mono blocks.
+
+    A block is voiced when its level is `threshold_db` above a tracked noise
+    floor and its zero-crossing rate is below `max_zcr` (broadband hiss).
+    push() returns only audio worth uploading: `preroll_ms` before onset, the
+    speech itself and at most `trail_ms` of each pause (longer pauses are held
+    back and only sent if speech resumes). It reports the end of an utterance
+    once `hangover_ms` of silence follows speech.
+    """
+    def __init__(self, samplerate: int, threshold_db: float = 12.0, start_ms: int = 60, hangover_ms: int = 600,
+                 preroll_ms: int = 200, trail_ms: int = 100, max_zcr: float = 0.4, calibrate_ms: int = 300):
+        self.sr = samplerate
+        self.threshold_db = threshold_db
+        self.start_ms = start_ms
+        self.hangover_ms = hangover_ms
+        self.preroll_ms = preroll_ms
+        self.trail_ms = trail_ms
+        self.max_zcr = max_zcr
+        self.noise_db = -60.0
+        self._calib_ms = calibrate_ms
+        self.reset()
+
+    def reset(self):
+        self.in_speech = False
+        self.voiced_ms = 0.0       # voiced duration of the current/last utterance
+        self._onset_ms = 0.0
+        self._silence_ms = 0.0
+        self._pre: collections.deque[bytes] = collections.deque()
+        self._pre_ms = 0.0
+        self._held: list[bytes] = []
+
+    def _ms(self, block) -> float:
+        return len(block) * 500.0 / self.sr  # 2 bytes per sample
+
+    def is_voiced(self, block) -> bool:
+        x = np.frombuffer(block, dtype=np.int16).astype(np.float32)
+        if not x.size:
+            return False
+        db = 20 * np.log10(np.sqrt(np.mean(x * x)) / 32768.0 + 1e-9)
+        if self._calib_ms > 0:  # learn the room first
+            self._calib_ms -= self._ms(block)
+            self.noise_db += 0.3 * (db - self.noise_db)
+            return False
+        zcr = np.count_nonzero(np.diff(np.signbit(x))) / x.size
+        voiced = db > self.noise_db + self.threshold_db and zcr < self.max_zcr
+        if db < self.noise_db:
+            self.noise_db += 0.3 * (db - self.noise_db)     # floor drops quickly
+        elif not voiced:
+            self.noise_db += 0.02 * (db - self.noise_db)    # and rises slowly
+        return voiced
+
+    def push(self, block: bytes) -> tuple[bytes, bool]:
+        """Feed one block; returns (audio to upload, utterance ended)."""
+        ms = self._ms(block)
+        voiced = self.is_voiced(block)
+        if not self.in_speech:
+            self._pre.append(block); self._pre_ms += ms
+            while len(self._pre) > 1 and self._pre_ms - self._ms(self._pre[0]) >= self.preroll_ms:
+                self._pre_ms -= self._ms(self._pre.popleft())
+            self._onset_ms = self._onset_ms + ms if voiced else 0.0
+            if self._onset_ms < self.start_ms:
+                return b"", False
+            self.in_speech, self.voiced_ms, self._silence_ms = True, self._onset_ms, 0.0
+            out = b"".join(self._pre); self._pre.clear(); self._pre_ms = 0.0
+            return out, False
+
+        if voiced:
+            self.voiced_ms += ms; self._silence_ms = 0.0
+            out = b"".join(self._held) + block if self._held else block
+            self._held.clear()
+            return out, False
+        self._silence_ms += ms
+        if self._silence_ms <= self.trail_ms:
+            return block, False
+        if self._silence_ms >= self.hangover_ms:
+            self._held.clear(); self.in_speech = False; self._onset_ms = 0.0
+            return b"", True
+        self._held.append(block)
+        return b"", False
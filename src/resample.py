@@ -0,0 +1,93 @@
+# resample.py
+"""
+Streaming polyphase resampler for PCM16 mono.
+
+The realtime client (src.realtime) uses it so audio devices can run at their
+native rate while the API speaks 24 kHz PCM16; audio_prep uses it to bring
+recordings down to 16 kHz for whisper. A Resampler converts one block at a
+time and keeps its filter history between blocks, so there are no clicks at
+block edges. All work arrays are allocated up front for the expected block
+size and grow only if a larger block arrives.
+"""
+
+from math import gcd
+import numpy as np
+
+
+def design_bank(up: int, down: int, taps: int = 32, beta: float = 8.0) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass split into `up` phases (reversed for dot products).
+
+    The prototype spans `taps` zero crossings of the narrower of the two rates,
+    i.e. max(up, down) * taps samples: decimation (down > up) needs a longer
+    filter per phase than interpolation for the same stopband.
+    """
+    per_phase = -(-max(up, down) * taps // up)
+    n = up * per_phase
+    cutoff = 0.9 / max(up, down)               # relative to the upsampled Nyquist rate
+    t = np.arange(n) - (n - 1) / 2
+    h = cutoff * np.sinc(cutoff * t) * np.kaiser(n, beta) * up
+    # phase p holds h[p], h[p+up], h[p+2up], ...; reversed so window[i] @ bank[p] is the convolution
+    return np.ascontiguousarray(h.reshape(per_phase, up).T[:, ::-1], dtype=np.float32)
+
+
+class Resampler:
+    """src_rate -> dst_rate for PCM16 mono bytes, block by block."""
+    def __init__(self, src_rate: int, dst_rate: int, block_frames: int = 1024, taps_per_phase: int = 32):
+        g = gcd(src_rate, dst_rate)
+        self.src_rate, self.dst_rate = src_rate, dst_rate
+        self.up, self.down = dst_rate // g, src_rate // g
+        self.bank = design_bank(self.up, self.down, taps_per_phase)
+        self.taps = self.bank.shape[1]
+        self._alloc(block_frames)
+        self.reset()
+
+    def _alloc(self, frames: int):
+        self._cap = frames
+        out_max = frames * self.up // self.down + 2
+        self._buf = np.zeros(self.taps - 1 + frames, dtype=np.float32)   # history + new input
+        self._u = np.empty(out_max, dtype=np.int64)                     # upsampled positions
+        self._idx = np.empty(out_max, dtype=np.int64)
+        self._ph = np.empty(out_max, dtype=np.int64)
+        self._win = np.empty((out_max, self.taps), dtype=np.float32)
+        self._coef = np.empty((out_max, self.taps), dtype=np.float32)
+        self._acc = np.empty(out_max, dtype=np.float32)
+        self._out = np.empty(out_max, dtype=np.int16)
+        self._steps = np.arange(out_max, dtype=np.int64) * self.down
+
+    def reset(self):
+        """Forget the filter history (e.g. after barge-in flushed the audio it belonged to)."""
+        self._buf[:self.taps - 1] = 0
+        self._pos = 0   # upsampled position of the next output, relative to the current block
+
+    def process(self, pcm: bytes) -> bytes:
+        if self.up == self.down:
+            return bytes(pcm)
+        x = np.frombuffer(pcm, dtype=np.int16)
+        n = len(x)
+        if n > self._cap:
+            hist = self._buf[:self.taps - 1].copy()
+            self._alloc(n)
+            self._buf[:self.taps - 1] = hist
+        h = self.taps - 1
+        buf = self._buf[:h + n]
+        buf[h:] = x
+        # outputs whose input index falls inside this block
+        count = max(0, -(-(n * self.up - self._pos) // self.down))
+        u = self._u[:count]
+        np.add(self._steps[:count], self._pos, out=u)
+        idx, ph = self._idx[:count], self._ph[:count]
+        np.floor_divide(u, self.up, out=idx)
+        np.remainder(u, self.up, out=ph)
+        windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps)  # windows[i] ends at input i
+        win, coef, acc = self._win[:count], self._coef[:count], self._acc[:count]
+        np.take(windows, idx, axis=0, out=win)
+        np.take(self.bank, ph, axis=0, out=coef)
+        np.multiply(win, coef, out=win)
+        np.sum(win, axis=1, out=acc)
+        out = self._out[:count]
+        np.clip(np.rint(acc, out=acc), -32768, 32767, out=acc)
+        out[:] = acc
+        # keep the last taps-1 inputs as history and carry the phase into the next block
+        self._buf[:h] = buf[n:]   # numpy copies safely when the ranges overlap
+        self._pos += count * self.down - n * self.up
+        return out.tobytes()
@@ -4,7 +4,15 @@ import plotly.graph_objects as go
 import streamlit as st
 
 # --- SELECT RANDOM VERB AND COLUMN ---
-def get_random_task(ws, selected_filter=None, selected_tenses=None):
+def get_random_task(ws, selected_filter=None, selected_tenses=None, preferred=None):
+    # A queued (row, col) drill (e.g. from Voice Chat) is used as-is unless that verb is completed
+    if preferred:
+        row, col = preferred
+        if str(ws[f"{con.STATUS_COL}{row}"].value).strip().lower() != "true":
+            verb = ws[f"{con.VERB_COL}{row}"].value
+            translation = ws[f"{con.TRANSLATION_COL}{row}"].value
+            return row, col, verb, f"{ws[f'{col}1'].value} — {ws[f'{col}2'].value}", translation
+
     rows = range(con.START_ROW, ws.max_row + 1)
     available_rows = []
     for r in rows:
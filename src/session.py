@@ -6,6 +6,7 @@ def init_session_state():
         "reset_input": False,
         "last_verb": None,
         "clear_input": False, 
+        "practice_deck": [],   # drills queued from Voice Chat (src.form_index)
         # "last_tense_selection": selected_tenses
     }
     for key, value in defaults.items():
@@ -0,0 +1,120 @@
+# tts_cache.py
+"""
+Content-addressed disk cache for text-to-speech audio.
+
+Key = sha256(model, voice, speed, normalized text), so the same phrase in the
+same voice is synthesized once and then served from disk with no API call.
+Files live under data/tts_cache/<2 hex>/<key>.mp3; a hit bumps the file's
+mtime and the oldest files are evicted once the cache exceeds its size limit.
+"""
+
+import os, re, hashlib, threading, unicodedata
+from pathlib import Path
+
+CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", Path(__file__).resolve().parents[1] / "data" / "tts_cache"))
+MAX_MB    = float(os.getenv("TTS_CACHE_MAX_MB", "200"))
+
+def normalize_text(text: str) -> str:
+    """NFC + collapsed whitespace, so trivially different strings share an entry."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+def cache_key(text: str, voice: str, model: str, speed: float = 1.0) -> str:
+    raw = "\0".join((model, voice, f"{speed:g}", normalize_text(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """Thread-safe LRU (by mtime) over a directory of audio files."""
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = int(MAX_MB * 1024 * 1024), ext: str = ".mp3"):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ext = ext
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None   # total bytes on disk, scanned on first write
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.ext}"
+
+    def get(self, key: str) -> bytes | None:
+        p = self._path(key)
+        try:
+            data = p.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(p)  # mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            existed = p.exists()
+            old = p.stat().st_size if existed else 0
+            os.replace(tmp, p)  # atomic: readers never see a partial file
+            if self._size is None:
+                self._size = self._scan()
+            else:
+                self._size += len(data) - old
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        return list(self.root.glob(f"*/*{self.ext}"))
+
+    def _scan(self) -> int:
+        return sum(f.stat().st_size for f in self._files())
+
+    def _evict(self):
+        # oldest first, down to 90% of the limit so we don't evict on every write
+        entries = []
+        for f in self._files():
+            try:
+                st = f.stat()
+                entries.append((st.st_mtime, st.st_size, f))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        target = int(self.max_bytes * 0.9)
+        for _, size, f in entries:
+            if self._size <= target:
+                break
+            try:
+                f.unlink()
+                self._size -= size
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()
+            return {"hits": self.hits, "misses": self.misses, "bytes": self._size, "files": len(self._files())}
+
+_default = None
+_default_lock = threading.Lock()
+
+def get_cache() -> TTSCache:
+    """Process-wide cache (shared by all Streamlit sessions)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = TTSCache()
+        return _default
+
+def cached_speech(client, text: str, voice: str, model: str = "tts-1", speed: float = 1.0,
+                  cache: TTSCache | None = None) -> bytes:
+    """audio.speech.create through the cache; a hit makes no API call."""
+    cache = cache or get_cache()
+    key = cache_key(text, voice, model, speed)
+    data = cache.get(key)
+    if data is None:
+        data = client.audio.speech.create(model=model, voice=voice, input=normalize_text(text), speed=speed).content
+        cache.put(key, data)
+    return data
@@ -0,0 +1,41 @@
+# verb_audio.py
+"""
+Audio for conjugated forms on the Conjugations page.
+
+If the offline pack has been built (python -m src.audio_pack build), forms are
+read from it and practice never touches the network. Without a pack, forms are
+synthesized through the TTS disk cache, which needs an API key.
+"""
+
+import os
+from src.openai_clients import get_client
+from src.audio_pack import get_pack
+from src.tts_cache import cached_speech
+
+VOICE = "nova"
+MODEL = "tts-1"
+
+def can_synthesize() -> bool:
+    """Whether forms missing from a pack can be synthesized (there is no pack and there is a key)."""
+    return get_pack() is None and bool(os.getenv("OPENAI_API_KEY"))
+
+def form_audio(text: str, row: int | None = None, col: str | None = None,
+               synthesize: bool = True) -> tuple[bytes, str] | None:
+    """(audio bytes, mime) for a form, or None if there is neither a pack nor an API key.
+
+    With synthesize=False only the pack is read, so the call never blocks on the API.
+    """
+    if not text:
+        return None
+    pack = get_pack()
+    if pack is not None:
+        clip = pack.get(row, col, text) if row is not None else None
+        return (bytes(clip), pack.mime) if clip is not None else None
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key or not synthesize:
+        return None
+    try:
+        return cached_speech(get_client(api_key), text, voice=VOICE, model=MODEL), "audio/mpeg"
+    except Exception as e:
+        print(f"[verb_audio] TTS failed for {text!r}: {e}")
+        return None
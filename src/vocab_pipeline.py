@@ -1,21 +1,31 @@
 # vocab_pipeline.py
-import os, sys, json, time, base64, hashlib, sqlite3, traceback, argparse, fnmatch, datetime, random
+import os, sys, io, json, time, base64, hashlib, sqlite3, traceback, argparse, fnmatch, datetime, random, queue, threading, uuid, tempfile, shutil
+from collections import deque
+from contextlib import contextmanager, redirect_stdout
+from types import SimpleNamespace
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageChops
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from dotenv import load_dotenv
-from openai import OpenAI
+try:
+    from src import openai_clients
+except ModuleNotFoundError as e:   # run as a script from src/
+    if e.name != "src":
+        raise
+    import openai_clients
 
 ENV_PATH = Path(__file__).resolve().parents[1] / ".env"
 load_dotenv(dotenv_path=ENV_PATH)
 
-# Safety check
-if not os.getenv("OPENAI_API_KEY"):
-    sys.exit(f"Error: OPENAI_API_KEY not found. Expected in {ENV_PATH}")
-
-# OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI client: the shared one from openai_clients, created on first use so offline
+# commands (stats, bench) need no key. Tests/benchmarks inject a stand-in with
+# openai_clients.set_client(); no key is needed then.
+def get_client():
+    try:
+        return openai_clients.get_client()
+    except RuntimeError:   # no key and nothing injected
+        raise RuntimeError(f"OPENAI_API_KEY not found. Expected in {ENV_PATH}") from None
 
 # ========== CONFIG ==========
 REPO_PATH = "Documents/03_Code/03_Pers/03_French_Verbs/french_verb_learning"
@@ -27,7 +37,16 @@ MODEL               = "gpt-4o-mini"          # vision-capable model ID
 CURRENT_PROMPT_VER  = 1                      # bump when you change instructions
 ALLOW_HEIC          = True                   # needs pillow-heif if True
 MAX_WIDTH           = 1400                   # downscale to control size/cost
-client              = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+SETTLE_POLL_S       = 0.25                   # how often pending files are re-checked
+SETTLE_CHECKS       = 2                      # unchanged size/mtime polls before a file is "ready"
+BATCH_DIR           = DB_DIR / "batches"     # JSONL request/result files for batch jobs
+BATCH_MAX_BYTES     = 190 * 1024 * 1024      # stay under the 200 MB batch input limit
+PHASH_GRID          = 32                     # dHash grid (32x32 = 1024 bits) over the content region
+PHASH_MAX_DIST      = 8                      # dHash bits (of 1024) that may differ for a reuse candidate
+STATUS_BAR_FRAC     = 0.06                   # top of the screen (clock, battery) ignored for duplicates
+DUP_PIXEL_DELTA     = 48                     # grey-level change that counts a pixel as different
+DUP_MAX_CHANGED     = 0.00002                # changed-pixel fraction allowed for a confirmed duplicate
+RETRY_BACKOFF_S     = 1.0                    # first rate-limit backoff, doubled per retry
 # ===========================
 
 
@@ -73,8 +92,56 @@ def init_db():
       translation_en TEXT,
       alt_translations TEXT,
       notes TEXT,
-      raw_json TEXT
+      raw_json TEXT,
+      phash TEXT,
+      reused_from TEXT
+    )""")
+    # older DBs predate the perceptual-hash columns
+    cols = {r[1] for r in con.execute("PRAGMA table_info(vocab_items)")}
+    for col in ("phash", "reused_from"):
+        if col not in cols:
+            con.execute(f"ALTER TABLE vocab_items ADD COLUMN {col} TEXT")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_vocab_phash ON vocab_items(phash)")
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS batch_jobs (
+      id TEXT PRIMARY KEY,
+      input_path TEXT,
+      n_items INTEGER,
+      status TEXT,
+      created_ts DATETIME DEFAULT CURRENT_TIMESTAMP,
+      ingested_ts DATETIME
+    )""")
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS batch_items (
+      batch_id TEXT,
+      item_id TEXT,
+      image_path TEXT,
+      phash TEXT,
+      prompt_ver INTEGER,        -- CURRENT_PROMPT_VER the request was built with
+      processed_ts DATETIME,     -- the item's last_processed_ts at submission
+      PRIMARY KEY (batch_id, item_id)
+    )""")
+    cols = {r[1] for r in con.execute("PRAGMA table_info(batch_items)")}
+    for col, typ in (("prompt_ver", "INTEGER"), ("processed_ts", "DATETIME")):
+        if col not in cols:
+            con.execute(f"ALTER TABLE batch_items ADD COLUMN {col} {typ}")
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS pipeline_metrics (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      run_id TEXT,
+      item_id TEXT,
+      file_name TEXT,
+      status TEXT,
+      started_at REAL,
+      finished_at REAL,
+      hash_ms REAL, decode_ms REAL, resize_ms REAL, encode_ms REAL,
+      request_ms REAL, parse_ms REAL, upsert_ms REAL, total_ms REAL,
+      retries INTEGER DEFAULT 0,
+      backoff_s REAL DEFAULT 0,
+      bytes_in INTEGER,
+      bytes_b64 INTEGER
     )""")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_metrics_run ON pipeline_metrics(run_id)")
     con.execute("""
     CREATE TABLE IF NOT EXISTS errors (
       id TEXT PRIMARY KEY,
@@ -89,52 +156,253 @@ def file_hash(path: Path) -> str:
     with open(path, "rb") as f: h.update(f.read())
     return h.hexdigest()[:24]
 
-def normalize_to_jpg_b64(path: Path) -> str:
+def path_id(path: Path) -> str:
+    """Fallback id for error rows when the file itself can't be read (e.g. deleted after settling)."""
+    return "path-" + hashlib.sha256(str(path).encode("utf-8")).hexdigest()[:19]
+
+def load_image(path: Path) -> Image.Image:
     if path.suffix.lower() == ".heic":
         import pillow_heif  # pip install pillow-heif
         heif = pillow_heif.read_heif(str(path))
         im = Image.frombytes(heif.mode, heif.size, heif.data, "raw")
     else:
         im = Image.open(path)
-    im = im.convert("RGB")
+    return im.convert("RGB")
+
+def content_region(im: Image.Image) -> Image.Image:
+    """Greyscale screen below the status bar (the clock changes between captures of one exercise)."""
+    return im.crop((0, int(im.height * STATUS_BAR_FRAC), im.width, im.height)).convert("L")
+
+def dhash(im: Image.Image, size: int = PHASH_GRID) -> str:
+    """size*size-bit difference hash of the content region, as hex.
+
+    Only a candidate filter: screens of one exercise type share a layout and can
+    hash alike with different text, so same_content() confirms before reuse.
+    """
+    g = content_region(im).resize((size + 1, size), Image.BILINEAR)
+    px = g.tobytes()
+    bits = 0
+    for row in range(size):
+        base = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (px[base + col] > px[base + col + 1])
+    return f"{bits:0{size * size // 4}x}"
+
+PHASH_HEX_LEN = PHASH_GRID * PHASH_GRID // 4   # hashes of another length predate the current grid
+
+def same_content(a: Image.Image, b: Image.Image) -> bool:
+    """Full-resolution pixel check of the content regions: a different sentence or hint bubble fails it."""
+    a, b = content_region(a), content_region(b)
+    if b.size != a.size:
+        b = b.resize(a.size, Image.BILINEAR)
+    changed = ImageChops.difference(a, b).point(lambda v: 255 if v > DUP_PIXEL_DELTA else 0).histogram()[255]
+    return changed <= DUP_MAX_CHANGED * a.width * a.height
+
+class PHashIndex:
+    """In-memory (phash, id) list for Hamming lookups; loaded once from the DB, appended on upsert."""
+    def __init__(self):
+        self._items: list[tuple[int, str]] | None = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        con = sqlite3.connect(DB_PATH)
+        rows = con.execute(
+            "SELECT phash,id FROM vocab_items WHERE length(phash)=? AND status='ok' AND model_id=? AND prompt_ver=?",
+            (PHASH_HEX_LEN, MODEL, CURRENT_PROMPT_VER)
+        ).fetchall()
+        con.close()
+        self._items = [(int(h, 16), _id) for h, _id in rows]
+
+    def add(self, phash: str, item_id: str):
+        with self._lock:
+            if self._items is not None and len(phash) == PHASH_HEX_LEN:
+                self._items.append((int(phash, 16), item_id))
+
+    def nearest(self, phash: str, max_dist: int = PHASH_MAX_DIST) -> list[tuple[int, str]]:
+        """Candidates within max_dist, closest first."""
+        with self._lock:
+            if self._items is None:
+                self._load()
+            h = int(phash, 16)
+            hits = [((h ^ other).bit_count(), _id) for other, _id in self._items]
+        return sorted(hit for hit in hits if hit[0] <= max_dist)
+
+phash_index = PHashIndex()
+
+def find_near_duplicate(con, phash: str, exclude_id: str, im: Image.Image):
+    """Return (id, distance, raw dict) of a current-version extraction for the same screen, else None.
+
+    Hash neighbours are only candidates; one is reused after same_content() on its
+    image file. Candidates whose file is gone are skipped rather than trusted.
+    """
+    for dist, cand_id in phash_index.nearest(phash):
+        if cand_id == exclude_id:
+            continue
+        row = con.execute(
+            "SELECT raw_json,image_path FROM vocab_items WHERE id=? AND status='ok' AND model_id=? AND prompt_ver=?",
+            (cand_id, MODEL, CURRENT_PROMPT_VER)
+        ).fetchone()
+        if not (row and row[0]):
+            continue
+        try:
+            other = load_image(Path(row[1]))
+        except Exception:
+            continue
+        if same_content(im, other):
+            return cand_id, dist, json.loads(row[0])
+    return None
+
+def downscale(im: Image.Image) -> Image.Image:
     if MAX_WIDTH and im.width > MAX_WIDTH:
         im = im.resize((MAX_WIDTH, int(im.height * (MAX_WIDTH / im.width))))
-    tmp = path.with_suffix(".tmp.jpg")
-    im.save(tmp, "JPEG", quality=90)
-    b64 = base64.b64encode(tmp.read_bytes()).decode()
-    tmp.unlink(missing_ok=True)
-    return b64
+    return im
 
-def call_vision_llm(image_b64: str) -> dict:
+def encode_jpg_b64(im: Image.Image) -> str:
+    # in memory: a temp .jpg next to the source would also trigger the folder watcher
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", quality=90)
+    return base64.b64encode(buf.getbuffer()).decode()
+
+def normalize_to_jpg_b64(path: Path, im: Image.Image | None = None) -> str:
+    if im is None:
+        im = load_image(path)
+    return encode_jpg_b64(downscale(im))
+
+def vision_request_body(image_b64: str) -> dict:
+    """Chat-completions payload; shared by the live call and batch JSONL lines."""
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": [
+                {"type": "text", "text": USER_PROMPT},
+                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_b64}"}}
+            ]}
+        ],
+        "temperature": 0,
+        "response_format": {"type": "json_object"},
+    }
+
+def call_vision_llm(image_b64: str, metrics: "ItemMetrics | None" = None) -> dict:
     max_retries = 5
-    backoff = 1.0  # start with 1 second
+    backoff = RETRY_BACKOFF_S
+    m = metrics or ItemMetrics()
 
     for attempt in range(max_retries):
         try:
-            resp = client.chat.completions.create(
-                model=MODEL,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": [
-                        {"type": "text", "text": USER_PROMPT},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_b64}"}}
-                    ]}
-                ],
-                temperature=0,
-                response_format={"type": "json_object"},
-            )
-            return json.loads(resp.choices[0].message.content)
+            with m.stage("request"):
+                resp = get_client().chat.completions.create(**vision_request_body(image_b64))
+            with m.stage("parse"):
+                return json.loads(resp.choices[0].message.content)
 
         except Exception as e:
             if "rate limit" in str(e).lower() or "429" in str(e):
                 wait = backoff * (2 ** attempt) + random.uniform(0, 0.25)
                 print(f"⚠️ Rate limit hit, sleeping {wait:.1f}s before retry...")
+                m.retries += 1
+                m.backoff_s += wait
                 time.sleep(wait)
             else:
                 raise
 
     raise RuntimeError("Failed after max retries due to rate limits.")
 
+# ---------- Metrics ----------
+RUN_ID = uuid.uuid4().hex[:12]  # groups metrics rows of one CLI invocation for throughput
+METRIC_STAGES = ("hash", "decode", "resize", "encode", "request", "parse", "upsert")
+
+class ItemMetrics:
+    """Per-item stage timings (ms) and retry counters; written to pipeline_metrics."""
+    def __init__(self, file_name: str = ""):
+        self.file_name = file_name
+        self.item_id = None
+        self.status = "ok"
+        self.stages = dict.fromkeys(METRIC_STAGES, 0.0)
+        self.retries = 0
+        self.backoff_s = 0.0
+        self.bytes_in = None
+        self.bytes_b64 = None
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+def record_metrics(m: ItemMetrics):
+    try:
+        con = sqlite3.connect(DB_PATH)
+        con.execute(f"""
+          INSERT INTO pipeline_metrics
+          (run_id,item_id,file_name,status,started_at,finished_at,
+           {",".join(f"{s}_ms" for s in METRIC_STAGES)},total_ms,retries,backoff_s,bytes_in,bytes_b64)
+          VALUES ({",".join("?" * (11 + len(METRIC_STAGES)))})
+        """, (RUN_ID, m.item_id, m.file_name, m.status, m.started_at, time.time(),
+              *(m.stages[s] for s in METRIC_STAGES), m.total_ms(), m.retries, m.backoff_s,
+              m.bytes_in, m.bytes_b64))
+        con.commit(); con.close()
+    except sqlite3.Error as e:
+        print(f"! metrics not recorded: {e}")
+
+def _pct(vals: list[float], q: float) -> float:
+    if not vals:
+        return 0.0
+    vals = sorted(vals)
+    return vals[min(len(vals) - 1, int(round(q * (len(vals) - 1))))]
+
+def print_stats(run: str | None = None, since: str | None = None, last: int | None = None):
+    where, params = [], []
+    if run == "latest":
+        con = sqlite3.connect(DB_PATH)
+        row = con.execute("SELECT run_id FROM pipeline_metrics ORDER BY id DESC LIMIT 1").fetchone()
+        con.close()
+        run = row[0] if row else None
+    if run:
+        where.append("run_id=?"); params.append(run)
+    if since:
+        where.append("started_at>=?"); params.append(datetime.datetime.fromisoformat(since).timestamp())
+    sql = "SELECT * FROM pipeline_metrics" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY id DESC"
+    if last:
+        sql += f" LIMIT {int(last)}"
+    con = sqlite3.connect(DB_PATH)
+    con.row_factory = sqlite3.Row
+    rows = con.execute(sql, params).fetchall()
+    con.close()
+    if not rows:
+        print("No metrics recorded yet.")
+        return
+
+    by_status: dict[str, int] = {}
+    for r in rows:
+        by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+    print(f"Items: {len(rows)}  " + "  ".join(f"{k}={v}" for k, v in sorted(by_status.items())))
+
+    total_all = sum(r["total_ms"] or 0 for r in rows) or 1.0
+    print(f"\n{'stage':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'share':>8}")
+    for s in METRIC_STAGES + ("total",):
+        vals = [r[f"{s}_ms"] or 0.0 for r in rows]
+        share = "" if s == "total" else f"{100 * sum(vals) / total_all:7.1f}%"
+        print(f"{s:<10}{sum(vals) / len(vals):>10.1f}{_pct(vals, .5):>10.1f}{_pct(vals, .95):>10.1f}{share:>8}")
+
+    retries = sum(r["retries"] or 0 for r in rows)
+    backoff = sum(r["backoff_s"] or 0 for r in rows)
+    print(f"\nRetries: {retries} ({sum(1 for r in rows if r['retries'])} item(s)), backoff slept {backoff:.1f}s")
+
+    runs: dict[str, list] = {}
+    for r in rows:
+        runs.setdefault(r["run_id"], []).append(r)
+    print(f"\n{'run':<14}{'items':>7}{'wall s':>9}{'items/s':>9}")
+    for run_id, rs in sorted(runs.items(), key=lambda kv: min(x["started_at"] for x in kv[1])):
+        wall = max(x["finished_at"] for x in rs) - min(x["started_at"] for x in rs)
+        print(f"{run_id:<14}{len(rs):>7}{wall:>9.1f}{(len(rs) / wall if wall > 0 else 0):>9.2f}")
+
 def should_process(con, item_id: str) -> bool:
     row = con.execute(
         "SELECT model_id,prompt_ver,status FROM vocab_items WHERE id=?",
@@ -148,13 +416,33 @@ def should_process(con, item_id: str) -> bool:
     if int(prompt_ver or 0) != int(CURRENT_PROMPT_VER): return True
     return False
 
-def upsert_item(rec: dict):
-    con = sqlite3.connect(DB_PATH)
-    con.execute("""
+def build_record(path: Path, item_id: str, data: dict, stat=None, phash: str | None = None,
+                 reused_from: str | None = None) -> dict:
+    stat = stat or path.stat()
+    return {
+        "id": item_id,
+        "image_path": str(path),
+        "file_name": path.name,
+        "file_dir": str(path.parent),
+        "file_size": stat.st_size,
+        "file_mtime": stat.st_mtime,
+        "model_id": MODEL,
+        "prompt_ver": CURRENT_PROMPT_VER,
+        "focused_term_fr": data.get("focused_term_fr",""),
+        "sentence_fr": data.get("sentence_fr",""),
+        "translation_en": data.get("translation_en",""),
+        "alt_translations": data.get("alt_translations",[]),
+        "notes": data.get("notes",""),
+        "raw": data,
+        "phash": phash,
+        "reused_from": reused_from,
+    }
+
+UPSERT_SQL = """
       INSERT INTO vocab_items
       (id,image_path,file_name,file_dir,file_size,file_mtime,model_id,prompt_ver,status,
-       focused_term_fr,sentence_fr,translation_en,alt_translations,notes,raw_json,last_processed_ts)
-      VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,CURRENT_TIMESTAMP)
+       focused_term_fr,sentence_fr,translation_en,alt_translations,notes,raw_json,phash,reused_from,last_processed_ts)
+      VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,CURRENT_TIMESTAMP)
       ON CONFLICT(id) DO UPDATE SET
         image_path=excluded.image_path,
         file_name=excluded.file_name,
@@ -170,15 +458,34 @@ def upsert_item(rec: dict):
         alt_translations=excluded.alt_translations,
         notes=excluded.notes,
         raw_json=excluded.raw_json,
+        phash=COALESCE(excluded.phash, vocab_items.phash),
+        reused_from=excluded.reused_from,
         last_processed_ts=CURRENT_TIMESTAMP
-    """, (
+"""
+
+def _upsert_params(rec: dict) -> tuple:
+    return (
         rec["id"], rec["image_path"], rec["file_name"], rec["file_dir"],
         rec["file_size"], rec["file_mtime"], rec["model_id"], rec["prompt_ver"],
         rec.get("status","ok"), rec["focused_term_fr"], rec["sentence_fr"],
         rec["translation_en"], json.dumps(rec.get("alt_translations", [])),
-        rec.get("notes",""), json.dumps(rec["raw"])
-    ))
-    con.commit(); con.close()
+        rec.get("notes",""), json.dumps(rec["raw"]), rec.get("phash"), rec.get("reused_from")
+    )
+
+def upsert_items(recs: list[dict]):
+    """Write many records in one transaction (batch ingestion)."""
+    if not recs:
+        return
+    con = sqlite3.connect(DB_PATH)
+    with con:
+        con.executemany(UPSERT_SQL, [_upsert_params(r) for r in recs])
+    con.close()
+    for rec in recs:
+        if rec.get("phash"):
+            phash_index.add(rec["phash"], rec["id"])
+
+def upsert_item(rec: dict):
+    upsert_items([rec])
 
 def save_error(item_id: str, path: Path, err: str):
     con = sqlite3.connect(DB_PATH)
@@ -186,7 +493,26 @@ def save_error(item_id: str, path: Path, err: str):
                 (item_id, str(path), err[:5000]))
     con.commit(); con.close()
 
+# Ids a worker is processing right now. The same file can be queued twice (initial scan and a
+# watcher event, or two settle rounds); the check-then-call in process_image is only safe per id.
+_in_flight: set[str] = set()
+_in_flight_lock = threading.Lock()
+
+def claim_item(item_id: str) -> bool:
+    """True if the caller now owns item_id; False if another worker is already on it."""
+    with _in_flight_lock:
+        if item_id in _in_flight:
+            return False
+        _in_flight.add(item_id)
+        return True
+
+def release_item(item_id: str):
+    with _in_flight_lock:
+        _in_flight.discard(item_id)
+
 def process_image(path: Path, force: bool = False):
+    m = ItemMetrics(path.name)
+    claimed = None
     try:
         if not path.exists():
             print(f"! Missing file: {path}")
@@ -194,63 +520,186 @@ def process_image(path: Path, force: bool = False):
         if path.suffix.lower() not in IMG_EXTS:
             return
 
-        item_id = file_hash(path)
+        with m.stage("hash"):
+            item_id = file_hash(path)
+        m.item_id = item_id
         stat = path.stat()
+        m.bytes_in = stat.st_size
+        if not claim_item(item_id):
+            m.status = None  # another worker has it; its result covers this copy too
+            print(f"… {path.name}: already being processed")
+            return
+        claimed = item_id
         con = sqlite3.connect(DB_PATH)
         if not force and not should_process(con, item_id):
             con.close()
+            m.status = None  # already up to date; not worth a metrics row
             return
+
+        with m.stage("decode"):
+            im = load_image(path)
+        with m.stage("hash"):
+            ph = dhash(im)
+        # Near-identical screenshot (e.g. only the clock changed): reuse its extraction.
+        # Forced reprocessing always goes back to the model.
+        near = None if force else find_near_duplicate(con, ph, item_id, im)
         con.close()
+        if near:
+            src_id, dist, data = near
+            with m.stage("upsert"):
+                upsert_item(build_record(path, item_id, data, stat, ph, reused_from=src_id))
+            m.status = "reused"
+            print(f"≈ {path.name}: reused {src_id} (dist={dist}) {data.get('focused_term_fr','')}")
+            return
+
+        with m.stage("resize"):
+            im = downscale(im)
+        with m.stage("encode"):
+            b64 = encode_jpg_b64(im)
+        m.bytes_b64 = len(b64)
+        data = call_vision_llm(b64, m)
 
-        b64 = normalize_to_jpg_b64(path)
-        data = call_vision_llm(b64)
-
-        rec = {
-            "id": item_id,
-            "image_path": str(path),
-            "file_name": path.name,
-            "file_dir": str(path.parent),
-            "file_size": stat.st_size,
-            "file_mtime": stat.st_mtime,
-            "model_id": MODEL,
-            "prompt_ver": CURRENT_PROMPT_VER,
-            "focused_term_fr": data.get("focused_term_fr",""),
-            "sentence_fr": data.get("sentence_fr",""),
-            "translation_en": data.get("translation_en",""),
-            "alt_translations": data.get("alt_translations",[]),
-            "notes": data.get("notes",""),
-            "raw": data
-        }
-        upsert_item(rec)
+        rec = build_record(path, item_id, data, stat, ph)
+        with m.stage("upsert"):
+            upsert_item(rec)
         print(f"✓ {path.name}: {rec['focused_term_fr']} → {rec['translation_en']}")
     except Exception as e:
-        save_error(file_hash(path), path, f"{e}\n{traceback.format_exc()}")
+        m.status = "error"
+        save_error(m.item_id or path_id(path), path, f"{e}\n{traceback.format_exc()}")
         print(f"✗ {path.name}: {e}")
+    finally:
+        if claimed:
+            release_item(claimed)
+        if m.status and m.item_id:
+            record_metrics(m)
+
+class SettleTracker:
+    """Coalesces watchdog events per path and releases files once their size/mtime stop changing.
+
+    Watchdog threads only call touch(); a single settler thread polls pending
+    paths and hands ready ones to the processing queue, so bursts never block
+    the observer and readiness costs one poll period instead of a fixed sleep.
+    """
+    def __init__(self, out_q: "queue.Queue[Path|None]", poll_s: float = SETTLE_POLL_S, checks: int = SETTLE_CHECKS):
+        self.out_q = out_q
+        self.poll_s = poll_s
+        self.checks = checks
+        self._pending: dict[Path, list] = {}   # path -> [last (size, mtime), stable_count]
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thr = threading.Thread(target=self._run, name="settler", daemon=True)
+
+    def start(self):
+        self._thr.start()
+
+    def stop(self):
+        self._stop.set(); self._wake.set()
+        self._thr.join(timeout=2.0)
+
+    def touch(self, path: Path):
+        if path.suffix.lower() not in IMG_EXTS:
+            return
+        with self._lock:
+            # any new event resets stability; repeated events for the same file coalesce here
+            self._pending[path] = [None, 0]
+        self._wake.set()
+
+    def forget(self, path: Path):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                idle = not self._pending
+            if idle:
+                self._wake.wait(); self._wake.clear()
+                continue
+            time.sleep(self.poll_s)
+            ready = []
+            with self._lock:
+                for p, st in list(self._pending.items()):
+                    try:
+                        s = p.stat()
+                    except FileNotFoundError:
+                        del self._pending[p]   # deleted or renamed away before it settled
+                        continue
+                    sig = (s.st_size, s.st_mtime)
+                    if s.st_size > 0 and sig == st[0]:
+                        st[1] += 1
+                    else:
+                        st[0], st[1] = sig, 0
+                    if st[1] >= self.checks:
+                        ready.append(p); del self._pending[p]
+            for p in ready:
+                self.out_q.put(p)
 
 class Handler(FileSystemEventHandler):
+    def __init__(self, tracker: SettleTracker):
+        super().__init__()
+        self.tracker = tracker
+
     def on_created(self, event):
         if event.is_directory: return
-        p = Path(event.src_path)
-        if p.suffix.lower() in IMG_EXTS:
-            time.sleep(1.5)  # allow write to finish
+        self.tracker.touch(Path(event.src_path))
+
+    def on_modified(self, event):
+        if event.is_directory: return
+        self.tracker.touch(Path(event.src_path))
+
+    def on_moved(self, event):
+        # AirDrop/Finder write to a temp name and rename into place
+        if event.is_directory: return
+        self.tracker.forget(Path(event.src_path))
+        self.tracker.touch(Path(event.dest_path))
+
+def process_worker(work_q: "queue.Queue[Path|None]"):
+    while True:
+        p = work_q.get()
+        if p is None:
+            break
+        try:
             process_image(p)
+        except Exception as e:
+            # never let one file take the worker down; the watcher would silently stop processing
+            print(f"✗ {p.name}: worker error: {e}")
+            traceback.print_exc()
 
-def initial_scan():
+def initial_scan(work_q: "queue.Queue[Path|None]"):
     for p in sorted(INPUT_DIR.glob("*")):
         if p.suffix.lower() in IMG_EXTS:
-            process_image(p)
+            work_q.put(p)
 
-def watch_loop():
+def watch_loop(workers: int = 1):
     print(f"Watching: {INPUT_DIR}")
-    initial_scan()
+    work_q: "queue.Queue[Path|None]" = queue.Queue()
+    threads = [threading.Thread(target=process_worker, args=(work_q,), name=f"worker-{i}", daemon=True)
+               for i in range(max(1, workers))]
+    for t in threads: t.start()
+    tracker = SettleTracker(work_q); tracker.start()
+    initial_scan(work_q)
     obs = Observer()
-    obs.schedule(Handler(), str(INPUT_DIR), recursive=False)
+    obs.schedule(Handler(tracker), str(INPUT_DIR), recursive=False)
     obs.start()
     try:
         while True: time.sleep(2)
     except KeyboardInterrupt:
         obs.stop()
     obs.join()
+    tracker.stop()
+    # drop the backlog so Ctrl-C only waits for files already in flight; the next start rescans them
+    dropped = 0
+    while True:
+        try:
+            if work_q.get_nowait() is not None:
+                dropped += 1
+        except queue.Empty:
+            break
+    if dropped:
+        print(f"Stopping: {dropped} queued file(s) left for the next run")
+    for _ in threads: work_q.put(None)
+    for t in threads: t.join()
 
 # ---------- Reprocess controls ----------
 def mark_for_review_by_name(pattern: str):
@@ -306,15 +755,364 @@ def reprocess_queue():
         process_image(Path(p), force=True)
         # set status back to ok happens in upsert_item()
 
+def backfill_phash():
+    con = sqlite3.connect(DB_PATH)
+    rows = con.execute("SELECT id,image_path FROM vocab_items WHERE phash IS NULL OR length(phash)!=?",
+                       (PHASH_HEX_LEN,)).fetchall()
+    n = 0
+    for _id, p in rows:
+        try:
+            ph = dhash(load_image(Path(p)))
+        except Exception as e:
+            print(f"! {p}: {e}")
+            continue
+        con.execute("UPDATE vocab_items SET phash=? WHERE id=?", (ph, _id))
+        n += 1
+    con.commit(); con.close()
+    print(f"Computed perceptual hash for {n}/{len(rows)} item(s).")
+
+# ---------- Batch mode ----------
+# Large backfills (e.g. after bumping CURRENT_PROMPT_VER) go through the Batch API:
+# one JSONL upload per <= BATCH_MAX_BYTES chunk, then bulk ingestion once the job is done.
+# `api` is anything exposing files.create/content and batches.create/retrieve like the
+# OpenAI client; FakeBatchAPI (below) stands in for it offline.
+
+BATCH_FINAL = ("ingested", "failed", "expired", "cancelled")   # job statuses that no longer hold items
+
+def prepare_batch_files(rows: list[tuple[str, str]]) -> list[tuple[Path, list[tuple[str, str, str]]]]:
+    """Write request JSONL chunks for (id, image_path) rows; returns [(jsonl_path, [(id, path, phash)])]."""
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    # unique per call: two submits in the same second must not overwrite each other's input files
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    chunks, items, size, f, fpath = [], [], 0, None, None
+    for _id, p in rows:
+        path = Path(p)
+        try:
+            im = load_image(path)
+            line = json.dumps({
+                "custom_id": _id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": vision_request_body(normalize_to_jpg_b64(path, im)),
+            }) + "\n"
+            ph = dhash(im)
+        except Exception as e:
+            save_error(_id, path, f"batch prepare: {e}")
+            print(f"✗ {path.name}: {e}")
+            continue
+        if f is None or size + len(line) > BATCH_MAX_BYTES:
+            if f is not None:
+                f.close(); chunks.append((fpath, items))
+            fpath = BATCH_DIR / f"requests-{stamp}-{len(chunks):03d}.jsonl"
+            f, items, size = open(fpath, "w", encoding="utf-8"), [], 0
+        f.write(line); size += len(line)
+        items.append((_id, str(path), ph))
+    if f is not None:
+        f.close(); chunks.append((fpath, items))
+    return chunks
+
+def submit_batch(api=None):
+    api = api or get_client()
+    con = sqlite3.connect(DB_PATH)
+    # items already in an open job are not sent again (they would be paid for twice)
+    rows = con.execute(f"""
+        SELECT id,image_path,last_processed_ts FROM vocab_items WHERE status='needs_review' AND id NOT IN (
+          SELECT bi.item_id FROM batch_items bi JOIN batch_jobs bj ON bj.id = bi.batch_id
+          WHERE bj.status NOT IN ({','.join('?' * len(BATCH_FINAL))}))""", BATCH_FINAL).fetchall()
+    con.close()
+    if not rows:
+        print("No items marked for review outside open batch jobs.")
+        return []
+    processed = {r[0]: r[2] for r in rows}   # lets ingestion tell if an item changed meanwhile
+    job_ids = []
+    for fpath, items in prepare_batch_files([r[:2] for r in rows]):
+        with open(fpath, "rb") as fh:
+            up = api.files.create(file=fh, purpose="batch")
+        job = api.batches.create(input_file_id=up.id, endpoint="/v1/chat/completions", completion_window="24h")
+        con = sqlite3.connect(DB_PATH)
+        with con:
+            con.execute("INSERT INTO batch_jobs (id,input_path,n_items,status) VALUES (?,?,?,?)",
+                        (job.id, str(fpath), len(items), job.status))
+            con.executemany("INSERT OR REPLACE INTO batch_items "
+                            "(batch_id,item_id,image_path,phash,prompt_ver,processed_ts) VALUES (?,?,?,?,?,?)",
+                            [(job.id, *it, CURRENT_PROMPT_VER, processed[it[0]]) for it in items])
+        con.close()
+        job_ids.append(job.id)
+        print(f"Submitted batch {job.id} with {len(items)} item(s) ({fpath.name}).")
+    return job_ids
+
+def _parse_batch_output(text: str) -> dict[str, dict | str]:
+    """custom_id -> extracted JSON dict, or an error string."""
+    out = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        r = json.loads(line)
+        resp = r.get("response") or {}
+        if r.get("error") or resp.get("status_code") != 200:
+            out[r["custom_id"]] = json.dumps(r.get("error") or resp.get("body"))[:5000]
+            continue
+        try:
+            out[r["custom_id"]] = json.loads(resp["body"]["choices"][0]["message"]["content"])
+        except Exception as e:
+            out[r["custom_id"]] = f"unparseable batch result: {e}"
+    return out
+
+def ingest_batch(job_id: str, api=None) -> str:
+    """Poll one job; when completed, bulk-upsert its results. Returns the job status."""
+    api = api or get_client()
+    job = api.batches.retrieve(job_id)
+    con = sqlite3.connect(DB_PATH)
+    con.execute("UPDATE batch_jobs SET status=? WHERE id=?", (job.status, job_id))
+    con.commit()
+    if job.status != "completed":
+        con.close()
+        return job.status
+
+    results = {}
+    for fid in (job.output_file_id, getattr(job, "error_file_id", None)):
+        if fid:
+            results.update(_parse_batch_output(api.files.content(fid).text))
+    items = con.execute("SELECT item_id,image_path,phash FROM batch_items WHERE batch_id=?", (job_id,)).fetchall()
+    # only items untouched since submission: still waiting for review, not reprocessed or
+    # re-marked in the meantime, and requested with the current prompt
+    current = {r[0] for r in con.execute("""
+        SELECT bi.item_id FROM batch_items bi JOIN vocab_items vi ON vi.id = bi.item_id
+        WHERE bi.batch_id=? AND vi.status='needs_review' AND bi.prompt_ver=?
+          AND vi.last_processed_ts IS bi.processed_ts""", (job_id, CURRENT_PROMPT_VER))}
+    con.close()
+
+    recs, n_err, n_skip = [], 0, 0
+    for item_id, p, ph in items:
+        path, res = Path(p), results.get(item_id, "missing from batch output")
+        if item_id not in current or not path.exists() or file_hash(path) != item_id:
+            n_skip += 1   # changed since submission (or the file was replaced); the newer state wins
+            continue
+        if isinstance(res, str):
+            save_error(item_id, path, f"batch {job_id}: {res}")
+            n_err += 1
+            continue
+        try:
+            recs.append(build_record(path, item_id, res, path.stat(), ph))
+        except FileNotFoundError:
+            save_error(item_id, path, f"batch {job_id}: image no longer on disk")
+            n_err += 1
+    upsert_items(recs)
+
+    con = sqlite3.connect(DB_PATH)
+    con.execute("UPDATE batch_jobs SET status='ingested', ingested_ts=CURRENT_TIMESTAMP WHERE id=?", (job_id,))
+    con.commit(); con.close()
+    print(f"Ingested batch {job_id}: {len(recs)} ok, {n_err} error(s), {n_skip} skipped (changed since submission).")
+    return "ingested"
+
+def ingest_batches(wait: bool = False, poll_s: float = 60.0, api=None):
+    final = set(BATCH_FINAL)
+    while True:
+        con = sqlite3.connect(DB_PATH)
+        jobs = [r[0] for r in con.execute(
+            f"SELECT id FROM batch_jobs WHERE status NOT IN ({','.join('?' * len(final))})", tuple(final))]
+        con.close()
+        if not jobs:
+            print("No open batch jobs.")
+            return
+        pending = 0
+        for job_id in jobs:
+            status = ingest_batch(job_id, api)
+            if status not in final:
+                pending += 1
+                print(f"… batch {job_id}: {status}")
+        if not wait or not pending:
+            return
+        time.sleep(poll_s)
+
+def batch_status():
+    con = sqlite3.connect(DB_PATH)
+    rows = con.execute("SELECT id,status,n_items,created_ts,ingested_ts FROM batch_jobs ORDER BY created_ts").fetchall()
+    con.close()
+    if not rows:
+        print("No batch jobs recorded.")
+    for _id, status, n, created, ingested in rows:
+        print(f"{_id}  {status:<12} {n:>5} item(s)  created {created}" + (f"  ingested {ingested}" if ingested else ""))
+
+# ---------- Benchmark ----------
+# Network-free harness: synthetic screenshots -> full process_image path -> FakeVisionClient.
+
+FAKE_EXTRACTION = {
+    "focused_term_fr": "combien", "sentence_fr": "Combien de pommes ?",
+    "translation_en": "how many", "alt_translations": ["how much"], "notes": "benchmark",
+}
+
+class FakeVisionClient:
+    """Stand-in for OpenAI(): chat.completions.create sleeps and sometimes answers 429."""
+    def __init__(self, latency_ms: float = 800.0, jitter_ms: float = 200.0, rate_429: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.calls = 0
+        self.n_429 = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **body):
+        with self._lock:
+            self.calls += 1
+            throttle = self._rng.random() < self.rate_429
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            if throttle:
+                self.n_429 += 1
+        time.sleep(delay)
+        if throttle:
+            raise RuntimeError("Error code: 429 - Rate limit reached (fake)")
+        content = json.dumps(FAKE_EXTRACTION)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class FakeBatchAPI:
+    """Stand-in for the OpenAI client's Batch API: files.create/content and batches.create/retrieve.
+
+    Jobs go validating -> in_progress -> completed, one step per retrieve(); the output file
+    answers every request line with the same extraction as FakeVisionClient.
+    """
+    STEPS = ("validating", "in_progress", "completed")
+
+    def __init__(self):
+        self.uploads = {}   # file id -> bytes
+        self.jobs = {}      # batch id -> SimpleNamespace
+        self._n = 0
+        self.files = SimpleNamespace(create=self._file_create, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._batch_create, retrieve=self._batch_retrieve)
+
+    def _new_id(self, prefix: str) -> str:
+        self._n += 1
+        return f"{prefix}-fake-{self._n:04d}"
+
+    def _file_create(self, file, purpose: str):
+        fid = self._new_id("file")
+        self.uploads[fid] = file.read()
+        return SimpleNamespace(id=fid, purpose=purpose)
+
+    def _file_content(self, file_id: str):
+        return SimpleNamespace(text=self.uploads[file_id].decode("utf-8"))
+
+    def _batch_create(self, input_file_id: str, endpoint: str, completion_window: str):
+        job = SimpleNamespace(id=self._new_id("batch"), input_file_id=input_file_id, endpoint=endpoint,
+                              status=self.STEPS[0], output_file_id=None, error_file_id=None)
+        self.jobs[job.id] = job
+        return job
+
+    def _batch_retrieve(self, batch_id: str):
+        job = self.jobs[batch_id]
+        step = self.STEPS.index(job.status)
+        if step < len(self.STEPS) - 1:
+            job.status = self.STEPS[step + 1]
+            if job.status == "completed":
+                job.output_file_id = self._new_id("file")
+                self.uploads[job.output_file_id] = self._answer(self.uploads[job.input_file_id])
+        return job
+
+    def _answer(self, requests: bytes) -> bytes:
+        content = json.dumps(FAKE_EXTRACTION)
+        lines = []
+        for line in requests.decode("utf-8").splitlines():
+            if line.strip():
+                lines.append(json.dumps({"custom_id": json.loads(line)["custom_id"], "error": None, "response": {
+                    "status_code": 200,
+                    "body": {"choices": [{"message": {"role": "assistant", "content": content}}]}}}))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+def generate_screenshots(out_dir: Path, n: int, width: int = 1170, height: int = 2532, fmt: str = "png",
+                         dup_rate: float = 0.0, seed: int = 0) -> list[Path]:
+    """Random block layouts (distinct dHashes); dup_rate of them are near-duplicates of an earlier image."""
+    from PIL import ImageDraw
+    if fmt == "heic":
+        import pillow_heif  # pip install pillow-heif
+        pillow_heif.register_heif_opener()
+    rng = random.Random(seed)
+    save_fmt = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG", "heic": "HEIF"}[fmt]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths, bases = [], deque(maxlen=4)   # only recent bases, and only if duplicates are wanted (~9 MB each)
+    for i in range(n):
+        if bases and rng.random() < dup_rate:
+            im = rng.choice(bases).copy()
+            # only the "status bar" changes, like two captures of the same exercise
+            ImageDraw.Draw(im).rectangle((0, 0, width, height // 40), fill=(rng.randrange(256),) * 3)
+        else:
+            im = Image.new("RGB", (width, height), (245, 245, 245))
+            d = ImageDraw.Draw(im)
+            for _ in range(12):
+                x0, y0 = rng.randrange(width), rng.randrange(height)
+                d.rectangle((x0, y0, x0 + rng.randrange(width // 2), y0 + rng.randrange(height // 6)),
+                            fill=tuple(rng.randrange(256) for _ in range(3)))
+            d.text((width // 10, height // 2), f"Combien de pommes ? #{i}", fill=(0, 0, 0))
+            if dup_rate > 0:
+                bases.append(im)
+        p = out_dir / f"bench_{i:05d}.{fmt}"
+        im.save(p, save_fmt)
+        paths.append(p)
+    return paths
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB on Linux
+
+def run_bench(n: int = 50, width: int = 1170, height: int = 2532, fmt: str = "png", workers: int = 1,
+              latency_ms: float = 800.0, jitter_ms: float = 200.0, rate_429: float = 0.0,
+              backoff_s: float = 0.05, dup_rate: float = 0.0, keep: bool = False, verbose: bool = False):
+    global DB_PATH, RETRY_BACKOFF_S, phash_index
+    saved = DB_PATH, RETRY_BACKOFF_S, phash_index
+    work_dir = Path(tempfile.mkdtemp(prefix="vocab_bench_"))
+    try:
+        print(f"Generating {n} {fmt.upper()} screenshot(s) at {width}x{height} in {work_dir} ...")
+        paths = generate_screenshots(work_dir / "img", n, width, height, fmt, dup_rate)
+        rss_before = _peak_rss_mb()   # generation's own high-water mark, reported next to the run's
+        DB_PATH, RETRY_BACKOFF_S, phash_index = work_dir / "bench.sqlite", backoff_s, PHashIndex()
+        init_db()
+        fake = FakeVisionClient(latency_ms, jitter_ms, rate_429)
+        openai_clients.set_client(fake)
+
+        work_q: "queue.Queue[Path|None]" = queue.Queue()
+        for p in paths: work_q.put(p)
+        threads = [threading.Thread(target=process_worker, args=(work_q,), daemon=True) for _ in range(max(1, workers))]
+        for _ in threads: work_q.put(None)
+        t0 = time.perf_counter()
+        with redirect_stdout(sys.stdout if verbose else io.StringIO()):
+            for t in threads: t.start()
+            for t in threads: t.join()
+        wall = time.perf_counter() - t0
+
+        con = sqlite3.connect(DB_PATH)
+        rows = con.execute("SELECT status,total_ms FROM pipeline_metrics WHERE run_id=?", (RUN_ID,)).fetchall()
+        con.close()
+        lat = [r[1] for r in rows]
+        by_status: dict[str, int] = {}
+        for st, _ in rows:
+            by_status[st] = by_status.get(st, 0) + 1
+        rss = _peak_rss_mb()
+        print(f"Items: {len(rows)}/{n}  " + "  ".join(f"{k}={v}" for k, v in sorted(by_status.items())))
+        print(f"Fake API: {fake.calls} call(s), {fake.n_429} x 429, latency {latency_ms:.0f}±{jitter_ms:.0f} ms, {workers} worker(s)")
+        print(f"Throughput: {n / wall:.2f} items/s over {wall:.1f}s")
+        print(f"Latency: p50 {_pct(lat, .5):.0f} ms, p95 {_pct(lat, .95):.0f} ms")
+        print(f"Peak RSS: {rss:.0f} MB (+{rss - rss_before:.0f} MB during the run)" if rss is not None else "Peak RSS: n/a")
+        print_stats(run=RUN_ID)
+    finally:
+        DB_PATH, RETRY_BACKOFF_S, phash_index = saved
+        openai_clients.set_client(None)
+        if keep:
+            print(f"Kept benchmark files in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
 # -------------- CLI ----------------
 def main():
-    ensure_dirs()
-    init_db()
-
     ap = argparse.ArgumentParser(description="Vocab pipeline: watch folder, extract terms via vision LLM, store in SQLite.")
     sub = ap.add_subparsers(dest="cmd")
 
-    sub.add_parser("watch", help="Watch the folder and process new images (default).")
+    wp = sub.add_parser("watch", help="Watch the folder and process new images (default).")
+    wp.add_argument("--workers", type=int, default=1, help="Parallel processing threads (mind API rate limits)")
 
     rp = sub.add_parser("reprocess", help="Mark items for review and reprocess.")
     rp.add_argument("--name", help='Glob pattern on file_name, e.g. "*combien*"', default=None)
@@ -322,11 +1120,67 @@ def main():
     rp.add_argument("--outdated", action="store_true", help="Mark all items with old model/prompt for review")
     rp.add_argument("--since", help='Mark items processed on/after date (YYYY-MM-DD) for review', default=None)
     rp.add_argument("--run", action="store_true", help="After marking, immediately reprocess the queue")
+    rp.add_argument("--batch", action="store_true", help="After marking, submit the queue as a Batch API job instead")
+
+    bp = sub.add_parser("batch", help="Batch API jobs for large backfills.")
+    bp.add_argument("action", choices=["submit", "ingest", "status"],
+                    help="submit the review queue, ingest finished jobs, or list jobs")
+    bp.add_argument("--wait", action="store_true", help="With ingest: keep polling until all jobs finish")
+    bp.add_argument("--poll", type=float, default=60.0, help="Polling interval in seconds for --wait")
+
+    stp = sub.add_parser("stats", help="Summarize per-stage timings, retries and throughput.")
+    stp.add_argument("--run", default=None, help='Only this run id ("latest" for the most recent run)')
+    stp.add_argument("--since", default=None, help="Only items started on/after date (YYYY-MM-DD)")
+    stp.add_argument("--last", type=int, default=None, help="Only the N most recent items")
+
+    sub.add_parser("backfill-phash", help="Compute perceptual hashes for items without one or hashed with an older grid.")
+
+    bn = sub.add_parser("bench", help="Offline benchmark with synthetic screenshots and a fake vision client.")
+    bn.add_argument("-n", type=int, default=50, help="Number of screenshots")
+    bn.add_argument("--size", default="1170x2532", help="WIDTHxHEIGHT of generated images")
+    bn.add_argument("--format", choices=["png", "jpg", "heic"], default="png", help="heic needs pillow-heif")
+    bn.add_argument("--workers", type=int, default=1, help="Parallel processing threads")
+    bn.add_argument("--latency-ms", type=float, default=800.0, help="Fake API latency")
+    bn.add_argument("--jitter-ms", type=float, default=200.0, help="Uniform +/- latency jitter")
+    bn.add_argument("--rate-429", type=float, default=0.0, help="Probability a fake call answers 429")
+    bn.add_argument("--backoff", type=float, default=0.05, help="First retry backoff (s) during the benchmark")
+    bn.add_argument("--dup-rate", type=float, default=0.0, help="Share of near-duplicate screenshots")
+    bn.add_argument("--keep", action="store_true", help="Keep generated images and DB")
+    bn.add_argument("--verbose", action="store_true", help="Show per-item pipeline output")
 
     args = ap.parse_args()
 
+    if args.cmd == "bench":
+        w, h = (int(x) for x in args.size.lower().split("x"))
+        run_bench(args.n, w, h, args.format, args.workers, args.latency_ms, args.jitter_ms,
+                  args.rate_429, args.backoff, args.dup_rate, args.keep, args.verbose)
+        return
+
+    ensure_dirs()
+    init_db()
+
+    if args.cmd not in ("stats", "backfill-phash") and not (args.cmd == "batch" and args.action == "status"):
+        try:
+            get_client()
+        except RuntimeError as e:
+            sys.exit(f"Error: {e}")
+
     if args.cmd in (None, "watch"):
-        watch_loop()
+        watch_loop(workers=getattr(args, "workers", 1))
+        return
+
+    if args.cmd == "stats":
+        print_stats(run=args.run, since=args.since, last=args.last)
+        return
+
+    if args.cmd == "backfill-phash":
+        backfill_phash()
+        return
+
+    if args.cmd == "batch":
+        if args.action == "submit":   submit_batch()
+        elif args.action == "ingest": ingest_batches(wait=args.wait, poll_s=args.poll)
+        else:                         batch_status()
         return
 
     if args.cmd == "reprocess":
@@ -335,7 +1189,8 @@ def main():
         if args.outdated: mark_outdated_for_review()
         if args.since:   mark_since_for_review(args.since)
         if args.run:     reprocess_queue()
-        else:            print("Use --run to process immediately (otherwise items are marked and will be picked up later).")
+        elif args.batch: submit_batch()
+        else:            print("Use --run (or --batch) to process immediately (otherwise items are marked and will be picked up later).")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
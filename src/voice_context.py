@@ -0,0 +1,105 @@
+# voice_context.py
+"""
+Bounded chat context for the Voice Chat page.
+
+The last `keep_turns` exchanges go to the model verbatim; everything older is
+folded into a running summary. Summaries are written by a background thread
+after a turn has been answered, so a turn never waits for one: until the
+summary catches up, not-yet-folded messages are sent verbatim, and the oldest
+messages are dropped if the prompt would exceed `token_budget`.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SUMMARY_MODEL      = "gpt-4o-mini"
+SUMMARY_MAX_TOKENS = 250
+KEEP_TURNS         = 6      # user+assistant exchanges kept verbatim
+TOKEN_BUDGET       = 2000   # prompt tokens for system + summary + history
+
+SUMMARY_PROMPT = (
+    "Tu résumes une conversation entre un étudiant de français et son professeur. "
+    "Écris un résumé court en français (5 phrases maximum) qui garde les sujets abordés, "
+    "ce que l'étudiant a raconté sur lui-même et ses erreurs récurrentes."
+)
+
+# one small pool per process: summaries are occasional and must never block a turn
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="voice-summary")
+
+def approx_tokens(text: str) -> int:
+    """~4 characters per token, plus per-message overhead; close enough for budgeting."""
+    return len(text) // 4 + 4
+
+class ConversationContext:
+    """Summary state for one conversation; the message list itself stays in session_state."""
+    def __init__(self, keep_turns: int = KEEP_TURNS, token_budget: int = TOKEN_BUDGET,
+                 model: str = SUMMARY_MODEL):
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.model = model
+        self.summary = ""
+        self.upto = 0           # history[:upto] is covered by the summary
+        self._trimmed = 0       # messages trim() has removed from the front of history so far
+        self._job = None
+        self._generation = 0    # bumps on reset so a late summary from a cleared chat is ignored
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.summary, self.upto, self._job, self._trimmed = "", 0, None, 0
+            self._generation += 1
+
+    def trim(self, history: list[dict], keep: int) -> int:
+        """Drop all but the newest `keep` messages from history, in place; returns how many went."""
+        with self._lock:
+            drop = max(0, len(history) - keep)
+            if drop:
+                del history[:drop]
+                self.upto = max(0, self.upto - drop)
+                self._trimmed += drop
+        return drop
+
+    def _cut(self, history: list[dict]) -> int:
+        return max(0, len(history) - 2 * self.keep_turns)
+
+    def build_messages(self, system_prompt: str, history: list[dict]) -> list[dict]:
+        with self._lock:
+            summary, upto = self.summary, self.upto
+        head = [{"role": "system", "content": system_prompt}]
+        if summary:
+            head.append({"role": "system", "content": f"Résumé de la conversation jusqu'ici : {summary}"})
+        tail = history[min(upto, self._cut(history)):]
+        # drop the oldest messages until the prompt fits (the newest always stays)
+        budget = self.token_budget - sum(approx_tokens(m["content"]) for m in head)
+        sizes = [approx_tokens(m["content"]) for m in tail]
+        start, total = 0, sum(sizes)
+        while total > budget and start < len(tail) - 1:
+            total -= sizes[start]; start += 1
+        return head + tail[start:]
+
+    def after_turn(self, client, history: list[dict]):
+        """Fold messages that left the verbatim window into the summary, in the background."""
+        cut = self._cut(history)
+        with self._lock:
+            if cut <= self.upto or (self._job and not self._job.done()):
+                return
+            old = [dict(m) for m in history[self.upto:cut]]
+            prev, gen, trimmed = self.summary, self._generation, self._trimmed
+            self._job = _executor.submit(self._summarize, client, prev, old, cut, gen, trimmed)
+
+    def _summarize(self, client, prev: str, messages: list[dict], upto: int, gen: int, trimmed: int):
+        lines = "\n".join(f"{'Étudiant' if m['role'] == 'user' else 'Professeur'} : {m['content']}" for m in messages)
+        user = (f"Résumé précédent : {prev}\n\n" if prev else "") + f"Nouveaux échanges :\n{lines}"
+        try:
+            resp = client.chat.completions.create(
+                model=self.model, max_tokens=SUMMARY_MAX_TOKENS,
+                messages=[{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": user}],
+            )
+            text = resp.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"[voice_context] summary failed, keeping messages verbatim: {e}")
+            return
+        with self._lock:
+            if gen == self._generation:
+                # history may have been trimmed while this ran; upto counted from its old front
+                self.summary, self.upto = text, max(0, upto - (self._trimmed - trimmed))
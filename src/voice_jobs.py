@@ -0,0 +1,89 @@
+# voice_jobs.py
+"""
+Background voice turns for the Voice Chat page.
+
+A turn (transcribe -> streamed reply -> TTS) runs on a process-wide thread pool
+instead of the Streamlit script thread, so the script returns right away and a
+fragment polls the job for progress. MAX_JOBS bounds how many turns run at once
+across all sessions; further turns wait in the pool's queue. Each session holds
+at most one job, and recording again cancels it.
+
+Only the job object is touched from the worker thread; session_state is
+updated by the page when it polls.
+"""
+
+import os, threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_JOBS = int(os.getenv("VOICE_MAX_JOBS", "4"))   # concurrent turns per server process
+
+_executor = ThreadPoolExecutor(max_workers=MAX_JOBS, thread_name_prefix="voice-turn")
+
+class VoiceJob:
+    """Progress of one turn: state, transcript, sentences so far, clips not yet played, result."""
+    def __init__(self, make_events, **meta):
+        self._make_events = make_events   # () -> iterator of voice_pipeline.voice_turn events
+        self.meta = meta                  # whatever the page needs back when the turn is done
+        self.state = "queued"             # queued | running | done | error | cancelled
+        self.transcript = None
+        self.sentences = []
+        self.clips = []                   # every clip, in order (for the replay control)
+        self.result = None                # the "done" event's info
+        self.error = None
+        self._played = 0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self.future = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "error", "cancelled")
+
+    def cancel(self):
+        """Stop after the current step; an API call already in flight is left to finish."""
+        self._cancel.set()
+        with self._lock:
+            if not self.finished:
+                self.state = "cancelled"
+
+    def take_clips(self) -> list[bytes]:
+        """Clips that arrived since the last call, in order."""
+        with self._lock:
+            new = self.clips[self._played:]
+            self._played = len(self.clips)
+        return new
+
+    def _run(self):
+        with self._lock:
+            if self._cancel.is_set() or self.state != "queued":
+                return   # cancelled before a worker picked it up
+            self.state = "running"
+        events = self._make_events()
+        try:
+            for ev in events:
+                if self._cancel.is_set():
+                    return
+                with self._lock:
+                    if ev[0] == "transcript":
+                        self.transcript = ev[1]
+                    elif ev[0] == "sentence":
+                        self.sentences.append(ev[2])
+                    elif ev[0] == "audio":
+                        self.clips.append(ev[2])
+                    elif ev[0] == "done":
+                        self.result = ev[1]
+            with self._lock:
+                if not self._cancel.is_set():
+                    self.state = "done"
+        except Exception as e:
+            print(f"[voice_jobs] turn failed: {e}")
+            with self._lock:
+                self.error, self.state = e, "error"
+        finally:
+            events.close()   # a cancelled turn stops streaming and stops queueing TTS
+
+def submit(make_events, **meta) -> VoiceJob:
+    """Run make_events() (a voice_turn generator factory) on the shared pool; meta is kept on the job."""
+    job = VoiceJob(make_events, **meta)
+    job.future = _executor.submit(job._run)
+    return job
@@ -0,0 +1,250 @@
+# voice_pipeline.py
+"""
+Streaming voice turn for the Voice Chat page:
+whisper transcription -> streamed chat reply -> TTS per sentence.
+
+Chat tokens are split at sentence boundaries as they arrive and each finished
+sentence is sent to TTS right away (a couple in parallel), so the first clip
+can play while the rest of the reply is still being written. voice_turn()
+yields events in order; the page only renders them and queues the audio.
+
+    python -m src.voice_pipeline            # fake clients: streamed vs serial latency
+"""
+
+import io, re, time, json, base64, hashlib, threading, argparse, tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from src.tts_cache import TTSCache, cached_speech
+
+STT_MODEL         = "whisper-1"
+TTS_MODEL         = "tts-1"
+MAX_TOKENS        = 500
+MIN_SENTENCE_CHARS = 12   # shorter pieces are merged into the next sentence
+TTS_WORKERS       = 2     # sentences synthesized concurrently
+
+# ---------- Sentence splitting ----------
+# end punctuation (plus closing quotes/brackets, French-spaced « ... ») once the next word has
+# started, or a line break; waiting for the next word keeps a trailing " »" with its sentence
+_BOUNDARY = re.compile(r'[.!?…]+(?:\s?[»")\]])*+(?=\s+\S)|\n')
+_ABBREV = ("M.", "Mme.", "Mlle.", "Dr.", "St.", "p.", "ex.", "cf.")
+
+class SentenceSplitter:
+    """Feed streamed text; get back complete sentences as soon as their boundary arrives."""
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self.buf = ""
+
+    def feed(self, text: str) -> list[str]:
+        self.buf += text
+        out, start = [], 0
+        for m in _BOUNDARY.finditer(self.buf):
+            cand = self.buf[start:m.end()].strip()
+            if len(cand) < self.min_chars or cand.endswith(_ABBREV):
+                continue  # keep growing this sentence
+            out.append(cand)
+            start = m.end()
+        self.buf = self.buf[start:]
+        return out
+
+    def flush(self) -> list[str]:
+        rest, self.buf = self.buf.strip(), ""
+        return [rest] if rest else []
+
+# ---------- Recordings ----------
+def audio_digest(audio: bytes) -> str:
+    """Short fingerprint used to tell a new recording from the one already processed."""
+    return hashlib.blake2b(audio, digest_size=16).hexdigest()
+
+def as_upload(audio: bytes, name: str = "recording.wav") -> io.BytesIO:
+    """In-memory file for the API; the name tells whisper the format."""
+    f = io.BytesIO(audio)
+    f.name = name
+    return f
+
+# ---------- API steps ----------
+def transcribe(client, audio_file, language: str = "fr") -> str:
+    return client.audio.transcriptions.create(model=STT_MODEL, file=audio_file, language=language).text
+
+def stream_reply(client, model: str, messages: list[dict], max_tokens: int = MAX_TOKENS):
+    """Yield text deltas of a streamed chat completion."""
+    stream = client.chat.completions.create(model=model, messages=messages, max_tokens=max_tokens, stream=True)
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        if hasattr(stream, "close"):
+            stream.close()   # an abandoned turn releases its HTTP connection right away
+
+def synthesize(client, text: str, voice: str, model: str = TTS_MODEL, speed: float = 1.0, cache=None) -> bytes:
+    """TTS through the disk cache (src.tts_cache): repeated sentences cost no API call."""
+    return cached_speech(client, text, voice, model=model, speed=speed, cache=cache)
+
+# ---------- Turn ----------
+def speak_reply(client, messages: list[dict], model: str, voice: str, t0: float | None = None,
+                tts_workers: int = TTS_WORKERS, synth=None):
+    """Stream the reply and synthesize it sentence by sentence.
+
+    Yields ("sentence", i, text) as soon as a sentence is complete, ("audio", i, mp3)
+    in sentence order as soon as its clip is ready, and finally ("done", info) with
+    the full text and timings (ms since t0).
+    """
+    t0 = t0 or time.monotonic()
+    synth = synth or (lambda text: synthesize(client, text, voice))
+    ms = lambda: round((time.monotonic() - t0) * 1000)
+    timings, parts = {}, []
+    splitter = SentenceSplitter()
+    pending = deque()   # (i, future) in sentence order
+
+    def ready():
+        while pending and pending[0][1].done():
+            i, fut = pending.popleft()
+            timings.setdefault("first_audio_ms", ms())
+            yield ("audio", i, fut.result())
+
+    with ThreadPoolExecutor(max_workers=tts_workers) as pool:
+        def submit(sentences):
+            for s in sentences:
+                i = len(parts); parts.append(s)
+                pending.append((i, pool.submit(synth, s)))
+                timings.setdefault("first_sentence_ms", ms())
+                yield ("sentence", i, s)
+
+        for delta in stream_reply(client, model, messages):
+            timings.setdefault("first_token_ms", ms())
+            yield from submit(splitter.feed(delta))
+            yield from ready()
+        yield from submit(splitter.flush())
+        while pending:
+            i, fut = pending.popleft()
+            audio = fut.result()
+            timings.setdefault("first_audio_ms", ms())
+            yield ("audio", i, audio)
+    timings["total_ms"] = ms()
+    yield ("done", {"text": " ".join(parts), "timings": timings})
+
+def voice_turn(client, audio_file, build_messages, model: str, voice: str, language: str = "fr", synth=None):
+    """One spoken turn: ("transcript", text), then speak_reply()'s events.
+
+    build_messages(user_text) returns the chat messages for this turn. Nothing
+    after the transcript is yielded if no speech was recognised.
+    """
+    t0 = time.monotonic()
+    user_text = transcribe(client, audio_file, language)
+    yield ("transcript", user_text)
+    if not user_text.strip():
+        return
+    yield from speak_reply(client, build_messages(user_text), model, voice, t0=t0, synth=synth)
+
+# ---------- Browser playback ----------
+# Clips are queued on the parent page (not inside the component iframe), so playback
+# continues across reruns and each new clip starts when the previous one ends.
+_QUEUE_JS = """
+<script>
+const w = window.parent;
+w.__voiceQueue = w.__voiceQueue || {items: [], audio: null};
+w.__voicePlay = w.__voicePlay || new w.Function(`
+  const q = window.__voiceQueue;
+  const url = q.items.shift();
+  if (!url) { q.audio = null; return; }
+  q.audio = new Audio(url);
+  q.audio.onended = q.audio.onerror = () => window.__voicePlay();
+  q.audio.play().catch(() => window.__voicePlay());
+`);
+%s
+</script>
+"""
+
+def audio_queue_html(mp3: bytes | None = None, clear: bool = False) -> str:
+    """HTML for st.components.v1.html(..., height=0): append a clip to the page's play queue, or stop and clear it."""
+    if clear:
+        body = "const q = w.__voiceQueue; q.items = []; if (q.audio) { q.audio.pause(); q.audio = null; }"
+    else:
+        url = "data:audio/mpeg;base64," + base64.b64encode(mp3).decode("ascii")
+        body = f"w.__voiceQueue.items.push({json.dumps(url)}); if (!w.__voiceQueue.audio) w.__voicePlay();"
+    return _QUEUE_JS % body
+
+# ---------- Fake clients / benchmark ----------
+class FakeVoiceClient:
+    """Stand-in for OpenAI(): transcription, streamed or whole chat replies, and TTS with sleeps."""
+    def __init__(self, reply: str, stt_ms: float = 400, first_token_ms: float = 350, token_ms: float = 25,
+                 tts_base_ms: float = 300, tts_ms_per_char: float = 4, transcript: str = "Bonjour, comment ça va ?"):
+        self.reply = reply
+        self.transcript = transcript
+        self.stt_ms, self.first_token_ms, self.token_ms = stt_ms, first_token_ms, token_ms
+        self.tts_base_ms, self.tts_ms_per_char = tts_base_ms, tts_ms_per_char
+        self.calls = {"stt": 0, "chat": 0, "tts": 0}
+        self._lock = threading.Lock()
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._transcribe),
+                                     speech=SimpleNamespace(create=self._speech))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+
+    def _count(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+
+    def _transcribe(self, **body):
+        self._count("stt")
+        time.sleep(self.stt_ms / 1000)
+        return SimpleNamespace(text=self.transcript)
+
+    def _tokens(self):
+        return re.findall(r"\S+\s*", self.reply)
+
+    def _chat(self, stream: bool = False, **body):
+        self._count("chat")
+        if not stream:
+            time.sleep((self.first_token_ms + self.token_ms * len(self._tokens())) / 1000)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))])
+        def gen():
+            time.sleep(self.first_token_ms / 1000)
+            for tok in self._tokens():
+                time.sleep(self.token_ms / 1000)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=tok))])
+        return gen()
+
+    def _speech(self, input: str, **body):
+        self._count("tts")
+        time.sleep((self.tts_base_ms + self.tts_ms_per_char * len(input)) / 1000)
+        return SimpleNamespace(content=b"ID3" + input.encode("utf-8"))
+
+def serial_turn(client, audio_file, messages: list[dict], model: str, voice: str, cache=None) -> dict:
+    """The old page flow (transcribe, whole reply, whole TTS), for comparison."""
+    t0 = time.monotonic()
+    transcribe(client, audio_file)
+    text = client.chat.completions.create(model=model, messages=messages, max_tokens=MAX_TOKENS).choices[0].message.content
+    synthesize(client, text, voice, cache=cache)
+    return {"first_audio_ms": round((time.monotonic() - t0) * 1000)}
+
+BENCH_REPLY = ("Très bien, merci ! Et toi, comment s'est passée ta journée ? "
+               "Si tu veux, on peut parler de tes projets pour le week-end. "
+               "Essaie de répondre avec le futur proche, par exemple : je vais aller au cinéma.")
+
+def main():
+    p = argparse.ArgumentParser(description="Compare streamed and serial voice turns with fake clients")
+    p.add_argument("--stt-ms", type=float, default=400)
+    p.add_argument("--first-token-ms", type=float, default=350)
+    p.add_argument("--token-ms", type=float, default=25)
+    p.add_argument("--tts-ms-per-char", type=float, default=4)
+    a = p.parse_args()
+    client = FakeVoiceClient(BENCH_REPLY, stt_ms=a.stt_ms, first_token_ms=a.first_token_ms,
+                             token_ms=a.token_ms, tts_ms_per_char=a.tts_ms_per_char)
+    messages = [{"role": "user", "content": client.transcript}]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSCache(tmp)   # keep benchmark clips out of the real cache
+        synth = lambda text: synthesize(client, text, "alloy", cache=cache)
+        serial = serial_turn(client, None, messages, "gpt-4o", "alloy", cache=cache)
+        runs = []
+        for _ in range(2):   # the second run's sentences are all cache hits
+            for ev in voice_turn(client, None, lambda text: messages, "gpt-4o", "alloy", synth=synth):
+                if ev[0] == "done":
+                    runs.append(ev[1]["timings"])
+    print(f"serial:   first audio {serial['first_audio_ms']} ms")
+    for label, t in zip(("streamed", "cached"), runs):
+        print(f"{label + ':':<9} first audio {t['first_audio_ms']} ms (first token {t['first_token_ms']} ms, "
+              f"first sentence {t['first_sentence_ms']} ms), all audio {t['total_ms']} ms")
+    print(f"TTS calls: {client.calls['tts']}, cache {cache.hits} hits / {cache.misses} misses")
+
+if __name__ == "__main__":
+    main()
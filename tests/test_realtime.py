@@ -0,0 +1,139 @@
+# test_realtime.py
+"""
+Realtime client checks against the in-process fakes: event dispatch, the
+decode fast path, playback buffering, and full turns over FakeRealtimeServer.
+
+    python -m pytest tests/test_realtime.py
+"""
+
+import asyncio, base64, json
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from src.realtime import client as rc
+from src.realtime.audio import AudioPlayer, ByteRing
+from src.realtime.client import RealtimeSession, build_parser
+from src.realtime.events import b64decode, b64encode, dumps, loads
+from src.realtime.harness import bench_decode, run_offline
+from src.realtime.turns import VADTurns
+
+SR = 24000
+
+@pytest.fixture
+def session():
+    s = RealtimeSession(build_parser().parse_args([]), None, AudioPlayer(SR), None, None, log=lambda *a, **k: None)
+    yield s
+    s.trace.close()
+
+# ---------- Dispatch ----------
+@pytest.mark.parametrize("types, handler", [
+    (rc.AUDIO_DELTA, "on_audio_delta"),
+    (rc.AUDIO_DONE, "on_ignore"),
+    (rc.TEXT_DELTA, "on_text_delta"),
+    (rc.TEXT_DONE, "on_text_done"),
+    (rc.ASSISTANT_TRANSCRIPT, "on_assistant_transcript"),
+    (rc.USER_TRANSCRIPT, "on_user_transcript"),
+    (("error",), "on_error"),
+    (("response.done", "response.completed"), "on_response_done"),
+    (("input_audio_buffer.committed",), "on_committed"),
+])
+def test_every_event_type_has_its_handler(session, types, handler):
+    for t in types:
+        assert session.handlers[t].__func__ is getattr(RealtimeSession, handler), t
+
+def test_unknown_events_fall_through_to_on_other(session):
+    assert "session.created" not in session.handlers
+    assert "response.function_call_arguments.delta" not in session.handlers
+
+def test_audio_delta_reaches_the_player(session):
+    pcm = bytes(range(256)) * 8
+    for key in ("delta", "audio"):   # both payload keys are accepted
+        msg = loads(dumps({"type": "response.output_audio.delta", key: b64encode(pcm)}))
+        session.handlers[msg["type"]](msg)
+        out = bytearray(len(pcm))
+        assert session.player.ring.readinto(out) == len(pcm)
+        assert bytes(out) == pcm
+
+def test_response_done_clears_the_pending_state(session):
+    session.awaiting_response = session.expecting_audio = True
+    session.handlers["response.done"]({"type": "response.done"})
+    assert not session.awaiting_response and not session.expecting_audio
+    assert session.response_done.is_set()
+
+# ---------- Decoding ----------
+def test_events_round_trip():
+    data = bytes(range(256))
+    assert b64decode(b64encode(data)) == data
+    assert b64encode(data) == base64.b64encode(data).decode()
+    event = {"type": "input_audio_buffer.append", "audio": b64encode(data)}
+    assert loads(dumps(event)) == event
+    assert json.loads(dumps(event)) == event
+
+def test_decode_benchmark():
+    res = bench_decode(n=2000, rounds=3)
+    # loose: the table path must not fall behind the old if-chain by much on any backend
+    assert 0 < res["current"] < res["legacy"] * 1.5
+
+# ---------- Playback buffer ----------
+def test_ring_wraps_and_counts_overruns():
+    ring = ByteRing(10)
+    out = bytearray(6)
+    assert ring.write(b"abcdef") == 6
+    assert ring.readinto(out) == 6 and bytes(out) == b"abcdef"
+    assert ring.write(b"0123456789xy") == 10   # wraps; two bytes don't fit
+    assert ring.overruns == 1 and ring.overrun_bytes == 2
+    out = bytearray(12)
+    assert ring.readinto(out) == 10
+    assert bytes(out) == b"0123456789\0\0" and ring.underruns == 1
+
+def test_ring_clear_skips_queued_audio():
+    ring = ByteRing(16)
+    ring.write(b"old audio")
+    ring.clear()
+    ring.write(b"new")
+    out = bytearray(3)
+    assert ring.readinto(out) == 3 and bytes(out) == b"new"
+
+# ---------- Barge-in echo guard ----------
+def _tone(db: float, ms: int = 20) -> bytes:
+    n = SR * ms // 1000
+    amp = 32768 * 10 ** (db / 20) * 2 ** 0.5
+    return (amp * np.sin(2 * np.pi * 200 * np.arange(n) / SR)).astype("<i2").tobytes()
+
+def _vad_session(playing: bool):
+    calls = []
+    async def record(name, *a, **k):
+        calls.append(name)
+    s = SimpleNamespace(args=SimpleNamespace(barge_in=True), awaiting_response=playing, calls=calls,
+                        player=SimpleNamespace(is_playing=lambda: playing), log=lambda *a, **k: None,
+                        begin_turn=lambda **k: record("begin_turn"), cancel_response=lambda: record("cancel"),
+                        push_audio=lambda chunk: record("push"), end_turn=lambda *a, **k: record("end_turn"))
+    return s
+
+async def _feed(turns, s, blocks):
+    for b in blocks:
+        await turns.on_block(s, b)
+
+@pytest.mark.parametrize("playing, level_db, barges_in", [
+    (True, -35.0, False),   # echo of the reply: 15 dB over the floor, below the raised threshold
+    (True, -20.0, True),    # the user talking over it
+    (False, -35.0, True),   # same level with nothing playing is an ordinary turn
+])
+def test_echo_guard(playing, level_db, barges_in):
+    turns, s = VADTurns(SR), _vad_session(playing)
+    asyncio.run(_feed(turns, s, [_tone(-50.0)] * 20 + [_tone(level_db)] * 25))
+    assert ("begin_turn" in s.calls) == barges_in
+    assert ("cancel" in s.calls) == (barges_in and playing)
+
+# ---------- Full turns against FakeRealtimeServer ----------
+def test_offline_turns_get_audio():
+    res = asyncio.run(run_offline(turns=2, speech_ms=600))
+    assert len(res) == 2
+    assert all(r["first_audio_ms"] is not None and not r["dropped"] for r in res)
+
+def test_offline_reconnect_resumes_the_session():
+    res = asyncio.run(run_offline(turns=2, speech_ms=600, drop_turn=0, client_args=["--reseed-items", "4"]))
+    rc_info = res.pop()
+    assert rc_info["connections"] >= 2 and rc_info["reconnects_ms"]
+    assert res[-1]["first_audio_ms"] is not None
@@ -0,0 +1,66 @@
+# test_vocab_batch.py
+"""
+Batch backfill against FakeBatchAPI: prepare -> submit -> resubmit (no-op) -> ingest.
+
+    python -m pytest tests/test_vocab_batch.py
+"""
+
+import sqlite3
+import pytest
+
+pytest.importorskip("openai")   # vocab_pipeline builds its client through src.openai_clients
+from src import vocab_pipeline as vp
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(vp, "DB_PATH", tmp_path / "vocab.sqlite")
+    monkeypatch.setattr(vp, "BATCH_DIR", tmp_path / "batches")
+    monkeypatch.setattr(vp, "phash_index", vp.PHashIndex())
+    vp.init_db()
+    paths = vp.generate_screenshots(tmp_path / "img", 4, 300, 600)
+    vp.upsert_items([vp.build_record(p, vp.file_hash(p), {"focused_term_fr": "old"}) for p in paths])
+    con = sqlite3.connect(vp.DB_PATH)
+    con.execute("UPDATE vocab_items SET status='needs_review'")
+    con.commit()
+    yield con, paths
+    con.close()
+
+def items(con):
+    return con.execute("SELECT file_name,focused_term_fr,status FROM vocab_items ORDER BY file_name").fetchall()
+
+def test_prepare_writes_one_request_per_item(db):
+    con, paths = db
+    rows = [(vp.file_hash(p), str(p)) for p in paths]
+    [(fpath, chunk)] = vp.prepare_batch_files(rows)
+    assert [c[0] for c in chunk] == [r[0] for r in rows]
+    assert len(fpath.read_text(encoding="utf-8").splitlines()) == len(rows)
+
+def test_submit_resubmit_ingest(db):
+    con, paths = db
+    api = vp.FakeBatchAPI()
+    [job_id] = vp.submit_batch(api)
+    assert api.jobs[job_id].status == "validating"
+    assert vp.submit_batch(api) == []          # everything is already in an open job
+    assert len(api.jobs) == 1
+
+    assert vp.ingest_batch(job_id, api) == "in_progress"
+    assert vp.ingest_batch(job_id, api) == "ingested"
+    assert [r[1:] for r in items(con)] == [("combien", "ok")] * len(paths)
+    assert vp.submit_batch(api) == []          # nothing left to review
+    vp.ingest_batches(api=api)                 # no open jobs: a no-op
+    assert con.execute("SELECT status FROM batch_jobs").fetchall() == [("ingested",)]
+
+def test_ingest_skips_items_changed_since_submission(db):
+    con, paths = db
+    api = vp.FakeBatchAPI()
+    [job_id] = vp.submit_batch(api)
+    # reprocessed live while the job ran, and re-marked after another live run
+    vp.upsert_item(vp.build_record(paths[0], vp.file_hash(paths[0]), {"focused_term_fr": "live"}))
+    con.execute("UPDATE vocab_items SET last_processed_ts='2099-01-01 00:00:00' WHERE id=?",
+                (vp.file_hash(paths[1]),))
+    con.commit()
+    vp.ingest_batches(wait=True, poll_s=0, api=api)
+    assert [r[1:] for r in items(con)] == [("live", "ok"), ("old", "needs_review"), ("combien", "ok"), ("combien", "ok")]
+    # the re-marked item goes out again in a new job
+    [again] = vp.submit_batch(api)
+    assert con.execute("SELECT item_id FROM batch_items WHERE batch_id=?", (again,)).fetchall() == [(vp.file_hash(paths[1]),)]
@@ -0,0 +1,42 @@
+# test_voice_pipeline.py
+"""
+Voice Chat turn against FakeVoiceClient: sentence splitting, event order, and
+that the first clip is ready before the reply has finished streaming.
+
+    python -m pytest tests/test_voice_pipeline.py
+"""
+
+from src.voice_pipeline import BENCH_REPLY, FakeVoiceClient, SentenceSplitter, voice_turn
+
+def test_splitter_waits_for_the_next_word():
+    s = SentenceSplitter(min_chars=5)
+    assert s.feed("Bonjour tout le monde.") == []          # could still be followed by « »
+    assert s.feed(" Ça va ?") == ["Bonjour tout le monde."]
+    assert s.flush() == ["Ça va ?"]
+
+def test_splitter_keeps_abbreviations_and_short_pieces():
+    s = SentenceSplitter(min_chars=12)
+    assert s.feed("Oui. M. Dupont est là. Et ") == ["Oui. M. Dupont est là."]
+    assert s.flush() == ["Et"]
+
+def test_voice_turn_streams_sentences_and_clips_in_order():
+    client = FakeVoiceClient(BENCH_REPLY, stt_ms=5, first_token_ms=5, token_ms=2, tts_base_ms=5, tts_ms_per_char=0)
+    synth = lambda text: client.audio.speech.create(input=text).content
+    events = list(voice_turn(client, None, lambda text: [{"role": "user", "content": text}], "gpt-4o", "alloy",
+                             synth=synth))
+    assert events[0] == ("transcript", client.transcript)
+    sentences = [e[2] for e in events if e[0] == "sentence"]
+    clips = [e for e in events if e[0] == "audio"]
+    assert len(sentences) == 4
+    assert [i for _, i, _ in clips] == list(range(len(sentences)))
+    assert [c[2] for c in clips] == [b"ID3" + s.encode("utf-8") for s in sentences]
+    done = events[-1]
+    assert done[0] == "done" and done[1]["text"] == " ".join(sentences)
+    t = done[1]["timings"]
+    assert t["first_audio_ms"] < t["total_ms"]
+    assert client.calls == {"stt": 1, "chat": 1, "tts": 4}
+
+def test_no_reply_without_speech():
+    client = FakeVoiceClient(BENCH_REPLY, stt_ms=0, transcript="  ")
+    events = list(voice_turn(client, None, lambda text: [], "gpt-4o", "alloy", synth=lambda text: b""))
+    assert events == [("transcript", "  ")] and client.calls["chat"] == 0